@@ -4,7 +4,7 @@ File Comparison Tool
 A tool for comparing video files between directories.
 
 Usage:
-    file_compare.py [-h] [-f {json,txt,csv,html}] [-m {normal,proxy,proxyadv}] [-o OUTPUT] path1 path2
+    file_compare.py [-h] [-f {json,txt,csv,html}] [-m {normal,proxy,proxyadv}] PATH PATH [PATH ...]
 
 Options:
   -h, --help            show this help message and exit
@@ -54,7 +54,29 @@ New in v1.3.0:
 New in v1.4.0:
     - Support for multiple export formats simultaneously
     - Removed -o/--output flag
+
+New in v1.5.0:
+    - N-way comparison: pass any number of groups, e.g.
+      python file_compare.py -m proxy /originals /proxies /backup /mirror
+      Results are reported as a presence matrix per key
+    - --detect-renames reports likely renamed/moved files as pairs
+    - proxyadv probes are scheduled per device with --probe-workers and
+      --device-limit MOUNT=N
+    - -f sqlite exports results to an indexed SQLite database
+    - .zip/.tar/.tar.gz archives can be compared without extracting them
+    - Pluggable probe backends (native MP4/MOV parser, mediainfo, ffprobe)
+      routed per container; override with --probe-backend
+    - --rollup collapses fully missing folders into one line per folder
+    - --manifest-reference reads group 1 from ASC MHL/.md5/.xxh64 manifests
+      and verifies group 2 against them; checksum sidecars are now skipped
+    - proxyadv runs write a journal of completed walks and probes;
+      --resume JOURNAL continues an interrupted run
+    - Scan planning: nested, duplicate and symlinked roots are walked once
+      and attributed to every group that contains them
+    - --engine numpy: columnar frame count comparison for huge proxyadv runs
+    - --serve PORT keeps the index warm and answers per-key and per-folder
+      queries over localhost HTTP, refreshing changed directories
 """
 
-__version__ = "1.4.0"
+__version__ = "1.5.0"
 __author__ = 'userprojekt'
\ No newline at end of file
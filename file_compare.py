@@ -2,12 +2,23 @@ import os
 import sys
 import argparse
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.exporters import export_to_json, export_to_txt, export_to_csv, export_to_html
+from src.exporters import export_to_json, export_to_txt, export_to_csv, export_to_html, export_to_sqlite
+from src.rename_detect import detect_renames
+from src.probe_scheduler import ProbeScheduler
+from src.probe_backends import ProbeRouter
+from src.archive_utils import ArchiveError, is_archive
+from src.rollup import build_rollup
+from src.manifest import ManifestError, get_manifest_dict, verify_against_manifest
+from src.journal import ScanJournal
+from src.scan_plan import scan_groups
+from src import columnar_compare
+from src.compare_service import CompareIndex, run_service
 
 def compare_simple(files1, files2):
     """
@@ -68,6 +79,223 @@ def compare_advanced(files1, files2):
     
     return unique1, unique2, frame_mismatches
 
+def compare_multi(groups, check_frames=False):
+    """
+    N-way comparison across any number of groups in a single pass.
+    
+    Args:
+        groups: List of file dictionaries, one per group
+        check_frames: Also compare frame counts (proxyadv mode)
+    
+    Returns:
+        tuple: (presence, frame_mismatches)
+               presence maps every key missing from at least one group
+               to the tuple of group indexes that do have it
+    """
+    all_keys = set()
+    for files in groups:
+        all_keys.update(files.keys())
+    
+    presence = {}
+    frame_mismatches = []
+    for key in all_keys:
+        present = tuple(i for i, files in enumerate(groups) if key in files)
+        if len(present) < len(groups):
+            presence[key] = present
+        
+        if not check_frames or len(present) < 2:
+            continue
+        
+        frames = [groups[i][key].get('frame_count') if i in present else None
+                  for i in range(len(groups))]
+        known = [f for f in frames if f is not None]
+        if len(set(known)) > 1:
+            frame_mismatches.append({
+                'basename': key,
+                'files': [groups[i][key]['filename'] if i in present else None
+                          for i in range(len(groups))],
+                'frames': frames,
+                'difference': max(known) - min(known),
+                'paths': [groups[i][key]['path'] if i in present else None
+                          for i in range(len(groups))]
+            })
+    
+    return presence, frame_mismatches
+
+def get_file_path(info):
+    """Return the full path of a scanned file (proxyadv stores a dict per file)"""
+    return info['path'] if isinstance(info, dict) else info
+
+def scan_group(paths, get_files_dict):
+    """
+    Scan every path of a group once, keeping the first occurrence of each key.
+    Returns (files, {directory: files listed}) like scan_groups()
+    """
+    group_files = {}
+    counts = {}
+    for path in paths:
+        print(f"Scanning: {path}")
+        files = get_files_dict(path, counts=counts)
+        for key, value in files.items():
+            if key not in group_files:
+                group_files[key] = value
+    return group_files, counts
+
+def compare_presence(groups, check_frames=False):
+    """
+    Compare any number of groups into the presence layout of compare_multi.
+    Two groups go through compare_simple/compare_advanced.
+    
+    Returns:
+        tuple: (presence, frame_mismatches)
+    """
+    if len(groups) != 2:
+        return compare_multi(groups, check_frames)
+    
+    compare = compare_advanced if check_frames else compare_simple
+    unique1, unique2, frame_mismatches = compare(*groups)
+    presence = {key: (0,) for key in unique1}
+    presence.update({key: (1,) for key in unique2})
+    return presence, frame_mismatches
+
+def serve_index(args, group_paths, get_files_dict, scheduler, timestamp):
+    """Build the warm comparison index and serve queries until interrupted"""
+    probe = None
+    if args.mode == 'proxyadv':
+        from src.proxy_compare_advanced import probe_frame_counts
+        
+        # The journal doubles as a probe cache: unchanged files are never re-probed
+        journal_path = args.resume or f"comparison_journal_{timestamp}.jsonl"
+        journal = ScanJournal(journal_path, resume=bool(args.resume))
+        print(f"Journal: {Path(journal_path).resolve()}")
+        router = ProbeRouter(args.probe_backend)
+        
+        def probe(groups):
+            probe_frame_counts(groups, scheduler, router, journal)
+            journal.compact()
+        
+        get_files_dict = partial(get_files_dict, probe=False)
+    
+    print("\nBuilding index...")
+    index = CompareIndex(group_paths, get_files_dict,
+                         partial(compare_presence, check_frames=args.mode == 'proxyadv'), probe)
+    return run_service(index, args.serve, args.refresh_interval)
+
+def parse_device_limits(parser, specs):
+    """Parse repeated MOUNT=N options into a dictionary of per-mount limits"""
+    limits = {}
+    for spec in specs:
+        mount, _, limit = spec.rpartition('=')
+        if not mount or not limit.isdigit() or int(limit) < 1:
+            parser.error(f'invalid --device-limit value: {spec} (expected MOUNT=N)')
+        limits[mount] = int(limit)
+    return limits
+
+def build_pair_export_data(args, mode_name, group_paths, groups, counts, scheduler):
+    """Compare two groups and prepare the classic two-column export data"""
+    paths1, paths2 = group_paths
+    files1, files2 = groups
+    counts1, counts2 = counts
+    
+    # Compare files using the appropriate comparison function
+    if args.mode == 'proxyadv':
+        advanced = (columnar_compare.compare_advanced_columnar if args.engine == 'numpy'
+                    else compare_advanced)
+        unique1, unique2, frame_mismatches = advanced(files1, files2)
+        print(f"Frame count mismatches found: {len(frame_mismatches)}")
+    else:
+        unique1, unique2, frame_mismatches = compare_simple(files1, files2)
+    
+    print(f"\nComparison Results:")
+    print(f"Files only in group 1: {len(unique1)}")
+    print(f"Files only in group 2: {len(unique2)}")
+    
+    # Prepare data for the exporters (matching the structure they expect)
+    # Get full paths for unique files
+    unique1_full_paths = [get_file_path(files1[key]) for key in unique1]
+    unique2_full_paths = [get_file_path(files2[key]) for key in unique2]
+
+    renames = []
+    if args.detect_renames:
+        print("\nDetecting renamed/moved files...")
+        renames = detect_renames(unique1_full_paths, unique2_full_paths)
+        print(f"Likely renames/moves found: {len(renames)}")
+        renamed1 = {rename['path1'] for rename in renames}
+        renamed2 = {rename['path2'] for rename in renames}
+        unique1_full_paths = [path for path in unique1_full_paths if path not in renamed1]
+        unique2_full_paths = [path for path in unique2_full_paths if path not in renamed2]
+
+    export_data = {
+        'mode': mode_name,
+        'path1': args.paths[0],
+        'path2': args.paths[1],
+        'dirs1': paths1,
+        'dirs2': paths2,
+        'unique1': sorted(unique1_full_paths),
+        'unique2': sorted(unique2_full_paths)
+    }
+        
+    # Add frame mismatches if present
+    if frame_mismatches:
+        export_data['frame_mismatches'] = frame_mismatches
+    
+    if args.detect_renames:
+        export_data['renames'] = renames
+    
+    if args.manifest_reference and args.mode == 'proxy':
+        # Proxy keys pair originals with transcodes, whose bytes never match the originals
+        print("\nChecksum verification skipped in proxy mode; manifests are used as the name reference only")
+    elif args.manifest_reference:
+        print("\nVerifying group 2 against the manifests...")
+        checksum_mismatches, summary = verify_against_manifest(files1, files2, get_file_path, scheduler)
+        print(f"Trusted (size and mtime match): {summary['trusted']}")
+        print(f"Verified by checksum: {summary['verified']}")
+        print(f"Could not be verified: {summary['unverifiable']}")
+        print(f"Checksum mismatches found: {len(checksum_mismatches)}")
+        export_data['checksum_mismatches'] = checksum_mismatches
+        export_data['checksum_summary'] = summary
+    
+    if args.rollup:
+        export_data['rollup1'] = build_rollup(unique1_full_paths, counts1, paths1)
+        export_data['rollup2'] = build_rollup(unique2_full_paths, counts2, paths2)
+        print(f"Rollup entries: {len(export_data['rollup1'])} in group 1, "
+              f"{len(export_data['rollup2'])} in group 2")
+    
+    return export_data
+
+def build_multi_export_data(args, mode_name, group_paths, groups):
+    """Compare N groups and prepare the presence-matrix export data"""
+    presence, frame_mismatches = compare_multi(groups, check_frames=args.mode == 'proxyadv')
+    if args.mode == 'proxyadv':
+        print(f"Frame count mismatches found: {len(frame_mismatches)}")
+    
+    print(f"\nComparison Results:")
+    print(f"Items missing from at least one group: {len(presence)}")
+    for index in range(len(groups)):
+        missing = sum(1 for present in presence.values() if index not in present)
+        print(f"Missing from group {index + 1}: {missing}")
+    
+    presence_rows = []
+    for key in sorted(presence):
+        presence_rows.append({
+            'key': key,
+            'paths': [get_file_path(files[key]) if index in presence[key] else None
+                      for index, files in enumerate(groups)]
+        })
+    
+    export_data = {
+        'mode': mode_name,
+        'groups': [{'path': spec, 'dirs': paths}
+                   for spec, paths in zip(args.paths, group_paths)],
+        'presence': presence_rows
+    }
+    
+    # Add frame mismatches if present
+    if frame_mismatches:
+        export_data['frame_mismatches'] = frame_mismatches
+    
+    return export_data
+
 def main():
     parser = argparse.ArgumentParser(
         description='Compare files between directories with support for video proxy workflows',
@@ -76,24 +304,81 @@ def main():
 Modes:
   normal    Compare all files by full filename (default)
   proxy     Compare video files by basename only
-  proxyadv  Proxy mode with frame count verification (requires mediainfo)
+  proxyadv  Proxy mode with frame count verification (built-in MP4/MOV parser,
+            mediainfo or ffprobe)
 
 Examples:
   %(prog)s /path/to/dir1 /path/to/dir2
   %(prog)s -m proxy /originals /proxies
   %(prog)s -m proxyadv -f html /originals /proxies
   %(prog)s "/dir1+/dir2" "/dir3"  # Compare combined directories
+  %(prog)s -m proxy /originals /proxies /backup /mirror  # N-way comparison
         '''
     )
     
-    parser.add_argument('path1', help='First directory or directories (use + to combine multiple)')
-    parser.add_argument('path2', help='Second directory or directories (use + to combine multiple)')
-    parser.add_argument('-f', '--format', choices=['json', 'txt', 'csv', 'html'], 
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                       help='Two or more groups of directories (use + to combine multiple in one group)')
+    parser.add_argument('-f', '--format', choices=['json', 'txt', 'csv', 'html', 'sqlite'], 
                        default=['html'], nargs='+', help='Output format(s) (default: html)')
     parser.add_argument('-m', '--mode', choices=['normal', 'proxy', 'proxyadv'],
                        default='normal', help='Comparison mode (default: normal)')
+    parser.add_argument('--detect-renames', action='store_true',
+                       help='Pair files only in one group with files only in the other group '
+                            'by size and content fingerprint to report likely renames/moves')
+    parser.add_argument('--rollup', action='store_true',
+                       help='Collapse folders whose files are all unique into one line with '
+                            'file count and total size (two groups only)')
+    parser.add_argument('--manifest-reference', action='store_true',
+                       help='Read group 1 from checksum manifests (ASC MHL, .md5, .xxh64, ...) '
+                            'instead of walking it, and verify the checksums of group 2 against them '
+                            '(normal and proxy modes, two groups only)')
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                       help='Comparison engine; numpy compares frame counts as 64-bit arrays, '
+                            'for millions of videos (proxyadv, two groups only, default: python)')
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                       help='Keep the index in memory and answer per-key and per-folder queries '
+                            'on http://127.0.0.1:PORT instead of exporting a report')
+    parser.add_argument('--refresh-interval', type=int, default=60, metavar='SECONDS',
+                       help='--serve: how often changed directories are re-scanned (default: 60)')
+    parser.add_argument('--probe-backend', choices=['auto', 'native', 'mediainfo', 'ffprobe'],
+                       default='auto',
+                       help='proxyadv: frame count backend; auto routes each container to the '
+                            'fastest available backend, benchmarked on its first files once per host '
+                            '(default: auto)')
+    parser.add_argument('--resume', metavar='JOURNAL',
+                       help='proxyadv: resume an interrupted run from its journal file, '
+                            'skipping completed walks and probes')
+    parser.add_argument('--probe-workers', type=int, default=2, metavar='N',
+                       help='proxyadv: concurrent probes per device; also used for '
+                            'manifest checksums (default: 2)')
+    parser.add_argument('--device-limit', action='append', default=[], metavar='MOUNT=N',
+                       help='proxyadv: concurrent probes for the device mounted at MOUNT '
+                            '(repeatable, overrides --probe-workers)')
     
     args = parser.parse_args()
+    if len(args.paths) < 2:
+        parser.error('at least two groups of paths are required')
+    if args.detect_renames and len(args.paths) > 2:
+        parser.error('--detect-renames is only supported when comparing two groups')
+    if args.rollup and len(args.paths) > 2:
+        parser.error('--rollup is only supported when comparing two groups')
+    if args.manifest_reference and (len(args.paths) > 2 or args.mode == 'proxyadv'):
+        parser.error('--manifest-reference is only supported for two groups in normal or proxy mode')
+    if args.engine == 'numpy' and (len(args.paths) > 2 or args.mode != 'proxyadv'):
+        parser.error('--engine numpy is only supported for two groups in proxyadv mode')
+    if args.engine == 'numpy' and not columnar_compare.is_available():
+        parser.error('--engine numpy requires NumPy (pip install numpy)')
+    if args.serve is not None and args.manifest_reference:
+        parser.error('--serve cannot be combined with --manifest-reference')
+    if args.refresh_interval < 1:
+        parser.error('--refresh-interval must be at least 1 second')
+    if args.resume and args.mode != 'proxyadv':
+        parser.error('--resume is only supported in proxyadv mode')
+    if args.resume and not os.path.isfile(args.resume):
+        parser.error(f'journal file does not exist: {args.resume}')
+    if args.probe_workers < 1:
+        parser.error('--probe-workers must be at least 1')
+    scheduler = ProbeScheduler(args.probe_workers, parse_device_limits(parser, args.device_limit))
     
     # Import the appropriate comparison module based on mode
     if args.mode == 'proxy':
@@ -101,7 +386,7 @@ Examples:
         print("Mode: Proxy comparison (by basename only)")
         mode_name = 'proxy'
     elif args.mode == 'proxyadv':
-        from src.proxy_compare_advanced import get_files_dict
+        from src.proxy_compare_advanced import get_files_dict, probe_frame_counts
         print("Mode: Advanced proxy comparison (with frame verification)")
         mode_name = 'proxy_advanced'
     else:
@@ -110,92 +395,69 @@ Examples:
         mode_name = 'normal'
     
     # Parse paths
-    paths1 = [p.strip() for p in args.path1.split('+')]
-    paths2 = [p.strip() for p in args.path2.split('+')]
+    group_paths = [[p.strip() for p in spec.split('+')] for spec in args.paths]
     
     # Display paths being compared
-    print(f"\nGroup 1 ({len(paths1)} path{'s' if len(paths1) > 1 else ''}):")
-    for p in paths1:
-        print(f"  - {p}")
-    
-    print(f"\nGroup 2 ({len(paths2)} path{'s' if len(paths2) > 1 else ''}):")
-    for p in paths2:
-        print(f"  - {p}")
+    for index, paths in enumerate(group_paths, 1):
+        print(f"\nGroup {index} ({len(paths)} path{'s' if len(paths) > 1 else ''}):")
+        for p in paths:
+            print(f"  - {p}")
     
     # Validate all paths
-    all_paths = paths1 + paths2
-    for path in all_paths:
-        if not os.path.exists(path):
-            print(f"\nError: Path does not exist: {path}")
-            return 1
-    
-    # Scan directories
-    print("\nScanning directories...")
-    files1 = {}
-    files2 = {}
-    
-    # Scan group 1
-    for path in paths1:
-        print(f"Scanning: {path}")
-        files = get_files_dict(path)
-        for key, value in files.items():
-            if key not in files1:
-                files1[key] = value
-    
-    # Scan group 2
-    for path in paths2:
-        print(f"Scanning: {path}")
-        files = get_files_dict(path)
-        for key, value in files.items():
-            if key not in files2:
-                files2[key] = value
-    
-    print(f"\nFound {len(files1)} unique items in group 1")
-    print(f"Found {len(files2)} unique items in group 2")
-    
-    # Compare files using the appropriate comparison function
-    if args.mode == 'proxyadv':
-        unique1, unique2, frame_mismatches = compare_advanced(files1, files2)
-        print(f"Frame count mismatches found: {len(frame_mismatches)}")
-    else:
-        unique1, unique2, frame_mismatches = compare_simple(files1, files2)
-    
-    print(f"\nComparison Results:")
-    print(f"Files only in group 1: {len(unique1)}")
-    print(f"Files only in group 2: {len(unique2)}")
+    for paths in group_paths:
+        for path in paths:
+            if not os.path.exists(path):
+                print(f"\nError: Path does not exist: {path}")
+                return 1
+            if args.mode == 'proxyadv' and is_archive(path):
+                print(f"\nError: Archives cannot be probed in proxyadv mode: {path}")
+                return 1
     
     # Generate timestamp for filenames
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
-    # Prepare data for the exporters (matching the structure they expect)
-    # Get full paths for unique files
-    unique1_full_paths = []
-    for key in unique1:
-        if args.mode == 'proxyadv':
-            unique1_full_paths.append(files1[key]['path'])
-        else:
-            unique1_full_paths.append(files1[key])
-
-    unique2_full_paths = []
-    for key in unique2:
+    try:
+        if args.serve is not None:
+            return serve_index(args, group_paths, get_files_dict, scheduler, timestamp)
+        
+        # Scan directories - each physical tree is walked (and probed) exactly once,
+        # even when it is listed several times or nested inside another path
+        print("\nScanning directories...")
         if args.mode == 'proxyadv':
-            unique2_full_paths.append(files2[key]['path'])
+            # Journal completed walks and probes so an interrupted run can be resumed
+            journal_path = args.resume or f"comparison_journal_{timestamp}.jsonl"
+            journal = ScanJournal(journal_path, resume=bool(args.resume))
+            print(f"Journal: {Path(journal_path).resolve()}")
+            
+            # Walk every tree first, then probe all groups through one scheduler
+            # so that probes on different devices are interleaved
+            groups, counts = scan_groups(group_paths, partial(get_files_dict, probe=False, journal=journal))
+            probe_frame_counts(groups, scheduler, ProbeRouter(args.probe_backend), journal)
+            journal.compact()
+            journal.close()
+        elif args.manifest_reference:
+            # Group 1 comes from its manifests; its data is never read
+            reference, reference_counts = scan_group(group_paths[0], partial(get_manifest_dict, mode=args.mode))
+            other, other_counts = scan_groups(group_paths[1:], get_files_dict)
+            groups = [reference, other[0]]
+            counts = [reference_counts, other_counts[0]]
         else:
-            unique2_full_paths.append(files2[key])
-
-    export_data = {
-        'mode': mode_name,
-        'path1': args.path1,
-        'path2': args.path2,
-        'dirs1': paths1,
-        'dirs2': paths2,
-        'unique1': sorted(unique1_full_paths),
-        'unique2': sorted(unique2_full_paths)
-    }
-        
-    # Add frame mismatches if present
-    if frame_mismatches:
-        export_data['frame_mismatches'] = frame_mismatches
+            groups, counts = scan_groups(group_paths, get_files_dict)
+    except ArchiveError as e:
+        print(f"\nError: Cannot read archive: {e.path}")
+        return 1
+    except ManifestError as e:
+        print(f"\nError: {str(e)}")
+        return 1
+    
+    print()
+    for index, files in enumerate(groups, 1):
+        print(f"Found {len(files)} unique items in group {index}")
+    
+    if len(groups) == 2:
+        export_data = build_pair_export_data(args, mode_name, group_paths, groups, counts, scheduler)
+    else:
+        export_data = build_multi_export_data(args, mode_name, group_paths, groups)
     
     # Export results for each requested format
     generated_files = []
@@ -209,6 +471,8 @@ Examples:
             export_to_csv(export_data, output_filename)
         elif fmt == 'html':
             export_to_html(export_data, output_filename)
+        elif fmt == 'sqlite':
+            export_to_sqlite(export_data, output_filename)
         else:  # txt
             export_to_txt(export_data, output_filename)
         
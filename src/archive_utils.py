@@ -0,0 +1,71 @@
+import os
+import tarfile
+import zipfile
+from src.file_utils import should_skip_file, should_skip_directory
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+class ArchiveError(Exception):
+    """Raised when an archive is corrupt, truncated or unreadable"""
+
+    def __init__(self, path):
+        super().__init__(f"Cannot read archive: {path}")
+        self.path = path
+
+def is_archive(path):
+    """Check if a group path is a supported archive file"""
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def _iter_member_names(archive_path):
+    """
+    Yield the names of all regular files in an archive without extracting it.
+    Zip archives are listed from the central directory only. Plain tar archives
+    are opened seekable, so member data is skipped over and only the headers are
+    read; compressed tars have to be decompressed front to back in streaming mode.
+    Raises ArchiveError if the archive cannot be read.
+    """
+    try:
+        if archive_path.lower().endswith('.zip'):
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        yield info.filename
+        else:
+            seekable = archive_path.lower().endswith('.tar')
+            size = os.path.getsize(archive_path)
+            with tarfile.open(archive_path, mode='r:' if seekable else 'r|*') as archive:
+                for member in archive:
+                    # Seeking past the end hides a truncated tar, so check the data fits
+                    if seekable and member.offset_data + member.size > size:
+                        raise tarfile.ReadError('truncated member')
+                    if member.isfile():
+                        yield member.name
+                # A header cut short ends the listing silently; a complete
+                # archive ends with zero blocks (or nothing at all)
+                if seekable:
+                    archive.fileobj.seek(archive.offset)
+                    if archive.fileobj.read(2 * tarfile.BLOCKSIZE).strip(b'\0'):
+                        raise tarfile.ReadError('truncated header')
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        raise ArchiveError(archive_path) from e
+
+def iter_archive_files(archive_path):
+    """
+    Yield (filename, full_path) for every file in an archive, applying the same
+    skip filters as a directory walk. full_path is the archive path joined with
+    the member path, e.g. /deliveries/day01.zip/A001/A001C001.mov
+    """
+    for name in _iter_member_names(archive_path):
+        parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.')]
+        if not parts:
+            continue
+
+        # Skip members inside system directories
+        if any(should_skip_directory(part) for part in parts[:-1]):
+            continue
+
+        filename = parts[-1]
+        if should_skip_file(filename):
+            continue
+
+        yield filename, os.path.join(archive_path, *parts)
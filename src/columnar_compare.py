@@ -0,0 +1,115 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def is_available():
+    """Check if NumPy is installed"""
+    return np is not None
+
+def _duplicates(hashes):
+    """Return the hash values occurring more than once in an array"""
+    ordered = np.sort(hashes)
+    return np.unique(ordered[1:][ordered[1:] == ordered[:-1]])
+
+def _join_keys(keys1, keys2):
+    """
+    Find the common keys of two object arrays of keys through sorted 64-bit hashes.
+
+    Keys are hashed once into int64 arrays and joined with a vectorized sorted
+    intersection. Every hash match is confirmed by comparing the keys themselves,
+    and keys whose hash value is shared by several keys on one side are joined
+    exactly with Python sets, so hash collisions never change the result.
+
+    Returns:
+        tuple: (index1, index2) aligned arrays of positions of the common keys
+    """
+    hashes1 = np.fromiter(map(hash, keys1), dtype=np.int64, count=len(keys1))
+    hashes2 = np.fromiter(map(hash, keys2), dtype=np.int64, count=len(keys2))
+
+    # One collision mask per side; almost always empty
+    colliding = np.union1d(_duplicates(hashes1), _duplicates(hashes2))
+    colliding1 = np.isin(hashes1, colliding)
+    colliding2 = np.isin(hashes2, colliding)
+    clean1 = np.flatnonzero(~colliding1)
+    clean2 = np.flatnonzero(~colliding2)
+
+    _, found1, found2 = np.intersect1d(hashes1[clean1], hashes2[clean2],
+                                       assume_unique=True, return_indices=True)
+    index1 = clean1[found1]
+    index2 = clean2[found2]
+
+    # Confirm every hash match on the keys themselves
+    equal = np.asarray(keys1[index1] == keys2[index2], dtype=bool)
+    index1 = index1[equal]
+    index2 = index2[equal]
+
+    # Keys with colliding hashes (normally none) are joined exactly
+    rest1 = np.flatnonzero(colliding1)
+    rest2 = np.flatnonzero(colliding2)
+    if len(rest1) and len(rest2):
+        positions2 = {keys2[i]: i for i in rest2}
+        pairs = [(i, positions2[keys1[i]]) for i in rest1 if keys1[i] in positions2]
+        if pairs:
+            extra1, extra2 = np.array(pairs, dtype=np.intp).T
+            index1 = np.concatenate([index1, extra1])
+            index2 = np.concatenate([index2, extra2])
+
+    return index1, index2
+
+def _unique_keys(keys, common_index):
+    """Return the set of keys not at the common positions"""
+    mask = np.ones(len(keys), dtype=bool)
+    mask[common_index] = False
+    return set(keys[mask].tolist())
+
+def _key_array(files):
+    """Return the keys of a files dictionary as a NumPy object array"""
+    keys = np.empty(len(files), dtype=object)
+    keys[:] = list(files)
+    return keys
+
+def _frame_array(files):
+    """Return the frame counts of a files dictionary as int64, -1 marking unknown"""
+    return np.fromiter((-1 if info.get('frame_count') is None else info['frame_count']
+                        for info in files.values()), dtype=np.int64, count=len(files))
+
+def compare_advanced_columnar(files1, files2):
+    """
+    Columnar equivalent of compare_advanced for very large key sets.
+    Frame counts are compared as int64 arrays in one vectorized step, and
+    mismatch dicts are only built for the rows that are reported.
+
+    Only used in proxyadv mode: a plain key join is faster with Python sets,
+    the gain comes from not comparing frame counts key by key.
+
+    Returns:
+        tuple: (unique1, unique2, frame_mismatches)
+    """
+    keys1 = _key_array(files1)
+    keys2 = _key_array(files2)
+    index1, index2 = _join_keys(keys1, keys2)
+
+    common1 = _frame_array(files1)[index1]
+    common2 = _frame_array(files2)[index2]
+    mismatched = np.flatnonzero((common1 >= 0) & (common2 >= 0) & (common1 != common2))
+
+    frame_mismatches = []
+    for row in mismatched.tolist():
+        key = keys1[index1[row]]
+        file1_info = files1[key]
+        file2_info = files2[key]
+        frame1 = int(common1[row])
+        frame2 = int(common2[row])
+        frame_mismatches.append({
+            'basename': key,
+            'file1': file1_info['filename'],
+            'file2': file2_info['filename'],
+            'frames1': frame1,
+            'frames2': frame2,
+            'difference': abs(frame1 - frame2),
+            'path1': file1_info['path'],
+            'path2': file2_info['path']
+        })
+
+    return _unique_keys(keys1, index1), _unique_keys(keys2, index2), frame_mismatches
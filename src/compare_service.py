@@ -0,0 +1,321 @@
+import os
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from src.file_utils import should_skip_directory
+from src.scan_plan import build_scan_plan, merge_segments
+
+class CompareIndex:
+    """
+    In-memory index of all groups, kept warm between queries.
+
+    Groups are listed once with the mode's get_files_dict following the scan plan,
+    one directory at a time, and the comparison is computed once. Queries are then
+    dictionary lookups. refresh() only stats the known directories, re-lists the
+    ones whose mtime changed (new, removed or renamed entries) and recomputes the
+    comparison from the patched listings.
+    """
+
+    def __init__(self, group_paths, get_files_dict, compare, probe=None):
+        """
+        Args:
+            group_paths: List of path lists, one per group
+            get_files_dict: Mode function called as get_files_dict(path, exclude=...)
+            compare: Function(groups) returning (presence, frame_mismatches),
+                     see compare_presence() in file_compare.py
+            probe: Optional function(list of files dicts) filling in frame counts
+        """
+        self.group_paths = group_paths
+        self.get_files_dict = get_files_dict
+        self.compare = compare
+        self.probe = probe
+        self.segments = build_scan_plan(group_paths)
+        for segment in self.segments:
+            # directory -> {mtime, subdirs, files} with the files directly in it
+            segment['dirs'] = {}
+        self.refreshed_at = None
+        self._refresh_lock = threading.Lock()
+        self._view = None
+
+    @staticmethod
+    def _mtime(path):
+        """Return the mtime of a path, or None if it is gone"""
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _list(self, segment, directory, mtime):
+        """List the files directly in one directory (or a whole archive) and its subdirectories"""
+        if not os.path.isdir(directory):
+            return {'mtime': mtime, 'subdirs': [], 'files': self.get_files_dict(directory, exclude=set())}
+
+        names = next(os.walk(directory), (None, [], None))[1]
+        subdirs = [os.path.join(directory, name) for name in names]
+        # Excluding every subdirectory limits the mode's walk to this directory
+        files = self.get_files_dict(directory, exclude=set(subdirs))
+        subdirs = [path for path, name in zip(subdirs, names)
+                   if not should_skip_directory(name) and path not in segment['exclude']]
+        return {'mtime': mtime, 'subdirs': subdirs, 'files': files}
+
+    @staticmethod
+    def _drop(dirs, directory, dropped):
+        """Forget a directory and everything listed below it"""
+        stack = [directory]
+        while stack:
+            listing = dirs.pop(stack.pop(), None)
+            if listing is not None:
+                dropped.update(listing['subdirs'])
+                stack.extend(listing['subdirs'])
+
+    def _sync(self, segment, force=False):
+        """
+        Re-list the directories of a segment whose mtime changed (all with force),
+        following new subdirectories and dropping removed ones.
+
+        Returns:
+            list: (directory, files dict) of every directory listed or removed
+        """
+        dirs = segment['dirs']
+        if dirs:
+            pending = [directory for directory, listing in dirs.items()
+                       if force or self._mtime(directory) != listing['mtime']]
+        else:
+            pending = [segment['path']]
+
+        listed = []
+        dropped = set()
+        while pending:
+            directory = pending.pop()
+            if directory in dropped:
+                continue
+            old = dirs.get(directory)
+            mtime = self._mtime(directory)
+            if mtime is None:
+                self._drop(dirs, directory, dropped)
+                listed.append((directory, {}))
+                continue
+
+            listing = self._list(segment, directory, mtime)
+            dirs[directory] = listing
+            listed.append((directory, listing['files']))
+            for subdir in listing['subdirs']:
+                if subdir not in dirs:
+                    pending.append(subdir)
+            if old is not None:
+                for subdir in old['subdirs']:
+                    if subdir not in listing['subdirs']:
+                        self._drop(dirs, subdir, dropped)
+        return listed
+
+    @staticmethod
+    def _merge(segment):
+        """Merge the directory listings of a segment top-down, first occurrence of a key wins"""
+        files = {}
+        stack = [segment['path']]
+        while stack:
+            listing = segment['dirs'].get(stack.pop())
+            if listing is None:
+                continue
+            for key, value in listing['files'].items():
+                if key not in files:
+                    files[key] = value
+            stack.extend(reversed(listing['subdirs']))
+        return files
+
+    def _update(self, force=False):
+        """Sync every segment, probe what was re-listed and return the re-listed directories"""
+        changed = []
+        to_probe = []
+        for segment in self.segments:
+            listed = self._sync(segment, force)
+            if not listed and 'files' in segment:
+                continue
+            segment['files'] = self._merge(segment)
+            for directory, files in listed:
+                changed.append(directory)
+                # Only the copies that won their key need a frame count
+                to_probe.append({key: value for key, value in files.items()
+                                 if segment['files'].get(key) is value})
+        if to_probe and self.probe is not None:
+            self.probe(to_probe)
+        return changed
+
+    def _rebuild_view(self):
+        """Recompute the comparison and lookup tables, then swap them in at once"""
+        groups = merge_segments(self.segments, len(self.group_paths))
+        presence, frame_mismatches = self.compare(groups)
+
+        # Folder index: directory -> [(group, key)] for per-folder queries.
+        # Keys with a copy that could not be probed cannot be confirmed complete
+        folders = {}
+        unprobeable = set()
+        for index, files in enumerate(groups):
+            for key, info in files.items():
+                path = info['path'] if isinstance(info, dict) else info
+                folders.setdefault(os.path.dirname(path), []).append((index, key))
+                if isinstance(info, dict) and info.get('frame_count') is None:
+                    unprobeable.add(key)
+
+        self._view = {
+            'groups': groups,
+            'presence': presence,
+            'frame_mismatches': {mismatch['basename']: mismatch for mismatch in frame_mismatches},
+            'unprobeable': unprobeable,
+            'folders': folders
+        }
+        self.refreshed_at = datetime.now().isoformat()
+
+    def build(self):
+        """List, probe and compare everything"""
+        with self._refresh_lock:
+            for segment in self.segments:
+                print(f"Scanning: {segment['path']}")
+            self._update()
+            self._rebuild_view()
+
+    def refresh(self, force=False):
+        """Re-list the directories that changed (all with force). Returns their paths"""
+        with self._refresh_lock:
+            changed = self._update(force)
+            if changed:
+                self._rebuild_view()
+            return changed
+
+    def lookup_key(self, key):
+        """
+        Presence, path and frame count of one key in every group.
+        complete is None (unknown) when the key is in every group but a copy
+        has no frame count, e.g. a truncated recording that could not be probed.
+        """
+        view = self._view
+        groups = []
+        for files in view['groups']:
+            info = files.get(key)
+            groups.append({
+                'present': info is not None,
+                'path': (info['path'] if isinstance(info, dict) else info) if info is not None else None,
+                'frame_count': info.get('frame_count') if isinstance(info, dict) else None
+            })
+        found = any(group['present'] for group in groups)
+        if not found or key in view['presence'] or key in view['frame_mismatches']:
+            complete = False
+        elif key in view['unprobeable']:
+            complete = None
+        else:
+            complete = True
+        return {
+            'key': key,
+            'found': found,
+            'complete': complete,
+            'groups': groups,
+            'frame_mismatch': view['frame_mismatches'].get(key)
+        }
+
+    def lookup_folder(self, folder):
+        """Per-group counts of the files under a folder, what is missing elsewhere and what could not be probed"""
+        view = self._view
+        folder = os.path.normpath(os.path.realpath(folder))
+        prefix = folder.rstrip(os.sep) + os.sep
+        groups = [{'files': 0, 'missing_elsewhere': []} for _ in view['groups']]
+        mismatches = set()
+        unprobeable = set()
+        for directory, entries in view['folders'].items():
+            if directory != folder and not directory.startswith(prefix):
+                continue
+            for index, key in entries:
+                groups[index]['files'] += 1
+                if key in view['presence']:
+                    groups[index]['missing_elsewhere'].append(key)
+                if key in view['frame_mismatches']:
+                    mismatches.add(key)
+                if key in view['unprobeable']:
+                    unprobeable.add(key)
+        for group in groups:
+            group['missing_elsewhere'].sort()
+        return {'folder': folder, 'groups': groups, 'frame_mismatches': sorted(mismatches),
+                'unprobeable': sorted(unprobeable)}
+
+    def status(self):
+        """Sizes of the index and of the comparison results"""
+        view = self._view
+        return {
+            'refreshed_at': self.refreshed_at,
+            'groups': [{'directories': paths, 'items': len(files)}
+                       for paths, files in zip(self.group_paths, view['groups'])],
+            'missing_somewhere': len(view['presence']),
+            'frame_mismatches': len(view['frame_mismatches']),
+            'unprobeable': len(view['unprobeable'])
+        }
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints: /status, /key?name=..., /folder?path=..., POST /refresh[?force=1]"""
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        index = self.server.index
+        if url.path == '/status':
+            self._send(200, index.status())
+        elif url.path == '/key' and 'name' in query:
+            self._send(200, index.lookup_key(query['name'][0]))
+        elif url.path == '/folder' and 'path' in query:
+            self._send(200, index.lookup_folder(query['path'][0]))
+        else:
+            self._send(404, {'error': 'use /status, /key?name=KEY or /folder?path=PATH'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == '/refresh':
+            force = parse_qs(url.query).get('force') == ['1']
+            self._send(200, {'refreshed': self.server.index.refresh(force)})
+        else:
+            self._send(404, {'error': 'use POST /refresh'})
+
+    def log_message(self, format, *args):
+        # Keep the console for scan progress; queries are too frequent to log
+        pass
+
+def run_service(index, port, refresh_interval=60):
+    """
+    Build the index and serve queries on 127.0.0.1:port until interrupted,
+    refreshing changed directories in the background every refresh_interval seconds.
+    """
+    index.build()
+
+    stop = threading.Event()
+
+    def refresh_loop():
+        while not stop.wait(refresh_interval):
+            try:
+                changed = index.refresh()
+            except Exception as e:
+                print(f"  Warning: Background refresh failed: {str(e)}")
+                continue
+            if changed:
+                print(f"Refreshed {len(changed)} changed director{'ies' if len(changed) > 1 else 'y'}")
+
+    threading.Thread(target=refresh_loop, daemon=True).start()
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), _RequestHandler)
+    server.index = index
+    print(f"\nServing comparison index on http://127.0.0.1:{server.server_address[1]}")
+    print("  GET /status, GET /key?name=KEY, GET /folder?path=PATH, POST /refresh[?force=1]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping service")
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
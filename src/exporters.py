@@ -2,7 +2,33 @@ import json
 import csv
 import html
 import os
+import sqlite3
 from datetime import datetime
+from itertools import islice
+
+SQLITE_BATCH_SIZE = 10000
+
+_SQLITE_TABLES = [
+    'CREATE TABLE run_info (key TEXT PRIMARY KEY, value TEXT)',
+    'CREATE TABLE groups (group_id INTEGER PRIMARY KEY, combined_path TEXT, directories TEXT)',
+    'CREATE TABLE unique_files (group_id INTEGER, directory TEXT, filename TEXT, path TEXT)',
+    'CREATE TABLE presence (key TEXT, group_id INTEGER, present INTEGER, path TEXT)',
+    'CREATE TABLE frame_mismatches (basename TEXT, group_id INTEGER, filename TEXT, '
+    'frames INTEGER, difference INTEGER, path TEXT)',
+    'CREATE TABLE renames (path1 TEXT, path2 TEXT, size INTEGER)',
+    'CREATE TABLE checksum_mismatches (key TEXT, reason TEXT, algorithm TEXT, expected TEXT, '
+    'actual TEXT, manifest_path TEXT, path TEXT)',
+    'CREATE TABLE rollup (group_id INTEGER, path TEXT, is_folder INTEGER, files INTEGER, size INTEGER)'
+]
+
+_SQLITE_INDEXES = [
+    'CREATE INDEX idx_unique_files_group_directory ON unique_files (group_id, directory)',
+    'CREATE INDEX idx_unique_files_filename ON unique_files (filename)',
+    'CREATE INDEX idx_presence_key ON presence (key)',
+    'CREATE INDEX idx_presence_group ON presence (group_id, present)',
+    'CREATE INDEX idx_frame_mismatches_difference ON frame_mismatches (difference)',
+    'CREATE INDEX idx_frame_mismatches_basename ON frame_mismatches (basename)'
+]
 
 
 def _get_html_style():
@@ -33,6 +59,8 @@ def _get_html_style():
         .path1 { background-color: #ffeeee; }
         .path2 { background-color: ##BFE1F7; }
         .mismatch { background-color: #fff3cd; }
+        .rename { background-color: #e8f0fe; }
+        .folder { font-weight: 600; }
         .path-header { 
             background-color: #f8f9fa;
             padding: 20px;
@@ -87,8 +115,46 @@ def _get_html_style():
     """
 
 
+def _format_size(size):
+    """Format a byte count for humans, e.g. 1.5 GB."""
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _format_rollup_entry(entry):
+    """Format a rollup entry as one line of text."""
+    if entry['is_folder']:
+        return f"{entry['path']}{os.sep} [entire folder: {entry['files']} files, {_format_size(entry['size'])}]"
+    return entry['path']
+
+
+def _export_groups_to_json(data, output_file):
+    """Export an N-way comparison (presence matrix) to JSON format."""
+    results = {
+        'mode': data['mode'],
+        'comparison_time': datetime.now().isoformat(),
+        'groups': [{'directories': group['dirs'], 'combined_path': group['path']}
+                   for group in data['groups']],
+        'presence_matrix': [{'key': row['key'],
+                             'present': [path is not None for path in row['paths']],
+                             'paths': row['paths']}
+                            for row in data['presence']]
+    }
+    
+    if 'frame_mismatches' in data:
+        results['frame_count_mismatches'] = data['frame_mismatches']
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+
+
 def export_to_json(data, output_file):
     """Export results to JSON format - maintains your original structure."""
+    if 'groups' in data:
+        return _export_groups_to_json(data, output_file)
+    
     results = {
         'mode': data['mode'],
         'comparison_time': datetime.now().isoformat(),
@@ -104,16 +170,71 @@ def export_to_json(data, output_file):
         'files_only_in_group2': data['unique2']
     }
     
+    # Rollup replaces the per-file lists with folder entries
+    if 'rollup1' in data:
+        del results['files_only_in_group1'], results['files_only_in_group2']
+        results['group1']['unique_file_count'] = len(data['unique1'])
+        results['group2']['unique_file_count'] = len(data['unique2'])
+        results['rollup_only_in_group1'] = data['rollup1']
+        results['rollup_only_in_group2'] = data['rollup2']
+    
     # Add frame mismatches if in advanced mode
     if 'frame_mismatches' in data:
         results['frame_count_mismatches'] = data['frame_mismatches']
     
+    # Add likely renames/moves if rename detection was requested
+    if 'renames' in data:
+        results['likely_renames'] = data['renames']
+    
+    # Add manifest verification if group 1 came from checksum manifests
+    if 'checksum_mismatches' in data:
+        results['checksum_verification'] = data['checksum_summary']
+        results['checksum_mismatches'] = data['checksum_mismatches']
+    
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=4, ensure_ascii=False)
 
 
+def _export_groups_to_txt(data, output_file):
+    """Export an N-way comparison (presence matrix) to text format."""
+    groups = data['groups']
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(f"File Comparison Results\n")
+        f.write(f"Mode: {data['mode']}\n")
+        f.write(f"Time: {datetime.now()}\n\n")
+        
+        for index, group in enumerate(groups, 1):
+            f.write(f"Group {index}:\n")
+            for dir_path in group['dirs']:
+                f.write(f"  - {dir_path}\n")
+        
+        # Presence matrix: X = present, - = missing
+        header = ' '.join(f"G{index}" for index in range(1, len(groups) + 1))
+        f.write(f"\nItems missing from at least one group ({len(data['presence'])} items):\n")
+        f.write(f"{header}  Key\n")
+        for row in data['presence']:
+            marks = ' '.join(f"{'X' if path is not None else '-':<{len(str(index)) + 1}}"
+                             for index, path in enumerate(row['paths'], 1))
+            f.write(f"{marks}  {row['key']}\n")
+        
+        if 'frame_mismatches' in data and data['frame_mismatches']:
+            f.write(f"\n{'='*80}\n")
+            f.write(f"FRAME COUNT MISMATCHES ({len(data['frame_mismatches'])} files)\n")
+            f.write(f"{'='*80}\n\n")
+            for mismatch in sorted(data['frame_mismatches'], key=lambda x: x['difference'], reverse=True):
+                f.write(f"Basename: {mismatch['basename']}\n")
+                for index, (file, frames, path) in enumerate(
+                        zip(mismatch['files'], mismatch['frames'], mismatch['paths']), 1):
+                    if file is not None:
+                        f.write(f"  Group {index}: {file} ({frames} frames) - {path}\n")
+                f.write(f"  Difference: {mismatch['difference']} frames\n\n")
+
+
 def export_to_txt(data, output_file):
     """Export results to text format - maintains your original structure."""
+    if 'groups' in data:
+        return _export_groups_to_txt(data, output_file)
+    
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(f"File Comparison Results\n")
         f.write(f"Mode: {data['mode']}\n")
@@ -129,8 +250,12 @@ def export_to_txt(data, output_file):
             f.write(f"Directory: {data['path1']}\n")
         
         f.write(f"({len(data['unique1'])} files):\n")
-        for file in sorted(data['unique1']):
-            f.write(f"{file}\n")
+        if 'rollup1' in data:
+            for entry in data['rollup1']:
+                f.write(f"{_format_rollup_entry(entry)}\n")
+        else:
+            for file in sorted(data['unique1']):
+                f.write(f"{file}\n")
         
         # Group 2
         f.write(f"\nFiles only in second group:\n")
@@ -142,8 +267,36 @@ def export_to_txt(data, output_file):
             f.write(f"Directory: {data['path2']}\n")
         
         f.write(f"({len(data['unique2'])} files):\n")
-        for file in sorted(data['unique2']):
-            f.write(f"{file}\n")
+        if 'rollup2' in data:
+            for entry in data['rollup2']:
+                f.write(f"{_format_rollup_entry(entry)}\n")
+        else:
+            for file in sorted(data['unique2']):
+                f.write(f"{file}\n")
+        
+        # Manifest verification if group 1 came from checksum manifests
+        if 'checksum_mismatches' in data:
+            summary = data['checksum_summary']
+            f.write(f"\n{'='*80}\n")
+            f.write(f"CHECKSUM MISMATCHES ({len(data['checksum_mismatches'])} files)\n")
+            f.write(f"{'='*80}\n")
+            f.write(f"Trusted (size and mtime match): {summary['trusted']}\n")
+            f.write(f"Verified by checksum: {summary['verified']}\n")
+            f.write(f"Could not be verified: {summary['unverifiable']}\n\n")
+            for mismatch in data['checksum_mismatches']:
+                f.write(f"File: {mismatch['path2']} ({mismatch['reason']})\n")
+                f.write(f"  Manifest: {mismatch['path1']}\n")
+                f.write(f"  Expected {mismatch['algorithm']}: {mismatch['expected']}\n")
+                if mismatch['actual']:
+                    f.write(f"  Actual {mismatch['algorithm']}: {mismatch['actual']}\n")
+                f.write("\n")
+        
+        # Likely renames/moves if rename detection was requested
+        if 'renames' in data:
+            f.write(f"\nLikely renamed/moved files ({len(data['renames'])} pairs):\n")
+            for rename in data['renames']:
+                f.write(f"{rename['path1']}\n")
+                f.write(f"  -> {rename['path2']} ({rename['size']} bytes)\n")
         
         # Frame mismatches if in advanced mode
         if 'frame_mismatches' in data and data['frame_mismatches']:
@@ -159,8 +312,41 @@ def export_to_txt(data, output_file):
                 f.write(f"  Path 2: {mismatch['path2']}\n\n")
 
 
+def _export_groups_to_csv(data, output_file):
+    """Export an N-way comparison (presence matrix) to CSV format."""
+    group_count = len(data['groups'])
+    with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Mode', data['mode']])
+        writer.writerow(['Time', datetime.now()])
+        writer.writerow([])
+        
+        for index, group in enumerate(data['groups'], 1):
+            writer.writerow([f'Group {index} Directories'] + group['dirs'])
+        writer.writerow([])
+        
+        # One presence column per group holding the path (empty when missing)
+        writer.writerow(['Key'] + [f'Group{index}' for index in range(1, group_count + 1)])
+        for row in data['presence']:
+            writer.writerow([row['key']] + [path or '' for path in row['paths']])
+        
+        if 'frame_mismatches' in data and data['frame_mismatches']:
+            writer.writerow([])
+            writer.writerow(['FRAME COUNT MISMATCHES'])
+            writer.writerow(['Basename', 'Difference'] +
+                            [f'Frames (Group {index})' for index in range(1, group_count + 1)] +
+                            [f'Path {index}' for index in range(1, group_count + 1)])
+            for mismatch in sorted(data['frame_mismatches'], key=lambda x: x['difference'], reverse=True):
+                writer.writerow([mismatch['basename'], mismatch['difference']] +
+                                ['' if frames is None else frames for frames in mismatch['frames']] +
+                                [path or '' for path in mismatch['paths']])
+
+
 def export_to_csv(data, output_file):
     """Export results to CSV format - maintains your original structure."""
+    if 'groups' in data:
+        return _export_groups_to_csv(data, output_file)
+    
     with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
         writer = csv.writer(f)
         writer.writerow(['Mode', data['mode']])
@@ -172,12 +358,39 @@ def export_to_csv(data, output_file):
         writer.writerow(['Group 2 Directories'] + data.get('dirs2', [data['path2']]))
         writer.writerow([])
         
-        writer.writerow(['Location', 'Path'])
+        if 'rollup1' in data:
+            writer.writerow(['Location', 'Path', 'Type', 'Files', 'Size (bytes)'])
+            for location, key in (('Group1', 'rollup1'), ('Group2', 'rollup2')):
+                for entry in data[key]:
+                    writer.writerow([location, entry['path'],
+                                     'folder' if entry['is_folder'] else 'file',
+                                     entry['files'], entry['size']])
+        else:
+            writer.writerow(['Location', 'Path'])
+            
+            for file in sorted(data['unique1']):
+                writer.writerow(['Group1', file])
+            for file in sorted(data['unique2']):
+                writer.writerow(['Group2', file])
         
-        for file in sorted(data['unique1']):
-            writer.writerow(['Group1', file])
-        for file in sorted(data['unique2']):
-            writer.writerow(['Group2', file])
+        # Manifest verification if group 1 came from checksum manifests
+        if data.get('checksum_mismatches'):
+            writer.writerow([])
+            writer.writerow(['CHECKSUM MISMATCHES'])
+            writer.writerow(['Key', 'Reason', 'Algorithm', 'Expected', 'Actual',
+                             'Manifest Path', 'Path 2'])
+            for mismatch in data['checksum_mismatches']:
+                writer.writerow([mismatch['key'], mismatch['reason'], mismatch['algorithm'],
+                                 mismatch['expected'], mismatch['actual'] or '',
+                                 mismatch['path1'], mismatch['path2']])
+        
+        # Likely renames/moves if rename detection was requested
+        if data.get('renames'):
+            writer.writerow([])
+            writer.writerow(['LIKELY RENAMES/MOVES'])
+            writer.writerow(['Path 1', 'Path 2', 'Size'])
+            for rename in data['renames']:
+                writer.writerow([rename['path1'], rename['path2'], rename['size']])
         
         # Frame mismatches if in advanced mode
         if 'frame_mismatches' in data and data['frame_mismatches']:
@@ -199,6 +412,96 @@ def export_to_csv(data, output_file):
                 ])
 
 
+def _export_groups_to_html(data, output_file, mode_description):
+    """Export an N-way comparison (presence matrix) to HTML format."""
+    groups = data['groups']
+    
+    groups_html = ''.join(f'''
+        <div class="path-header">
+            <h3>Group {index}</h3>
+            {''.join(f'<div class="path-text">{html.escape(d)}</div>' for d in group['dirs'])}
+        </div>''' for index, group in enumerate(groups, 1))
+    
+    group_headers = ''.join(f'<th>Group {index}</th>' for index in range(1, len(groups) + 1))
+    presence_rows = ''.join(
+        '<tr><td>{}</td>{}</tr>'.format(
+            html.escape(row['key']),
+            ''.join(f'<td class="path2" title="{html.escape(path)}">✓</td>' if path is not None
+                    else '<td class="path1">✗</td>' for path in row['paths']))
+        for row in data['presence'])
+    
+    mismatch_html = ""
+    if data['mode'] == 'proxy_advanced':
+        if data.get('frame_mismatches'):
+            mismatch_rows = ''.join(
+                '<tr class="mismatch"><td>{}</td>{}<td><strong>{:,}</strong></td></tr>'.format(
+                    html.escape(mismatch['basename']),
+                    ''.join('<td></td>' if frames is None else f'<td>{frames:,}</td>'
+                            for frames in mismatch['frames']),
+                    mismatch['difference'])
+                for mismatch in sorted(data['frame_mismatches'], key=lambda x: x['difference'], reverse=True))
+            
+            mismatch_html = f'''
+        <div class="section">
+            <div class="warning-box">
+                <h3>⚠️ Frame Count Mismatches ({len(data['frame_mismatches'])} files)</h3>
+                <p>These files exist in several groups but have different frame counts, indicating incomplete or corrupted proxy files:</p>
+            </div>
+            <table>
+                <tr><th>Basename</th>{''.join(f'<th>Frames (Group {index})</th>' for index in range(1, len(groups) + 1))}<th>Difference</th></tr>
+                {mismatch_rows}
+            </table>
+        </div>
+        '''
+        else:
+            mismatch_html = f'''
+        <div class="section">
+            <div class="warning-box" style="background-color: #d4edda; border-color: #c3e6cb;">
+                <h3 style="color: #155724;">✅ Frame Count Mismatches (0 files)</h3>
+                <p><strong>ALL</strong> files have matching frame counts</p>
+            </div>
+        </div>
+        '''
+    
+    html_content = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta http-equiv="Content-Type" content="text/html; charset=UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>File Comparison Results</title>
+    <style>{_get_html_style()}</style>
+</head>
+<body>
+    <h2>File Comparison Results</h2>
+    <div class="mode-info">
+        <strong>Mode:</strong> {mode_description}<br>
+        <strong>Time:</strong> {datetime.now()}
+    </div>
+    
+    {mismatch_html}
+    
+    <div class="section">
+        {groups_html}
+    </div>
+    
+    <div class="section">
+        <div class="path-header">
+            <h3>Items missing from at least one group: ({len(data['presence'])} items)</h3>
+        </div>
+        <table>
+            <tr><th>Key</th>{group_headers}</tr>
+            {presence_rows}
+        </table>
+    </div>
+</body>
+</html>"""
+    
+    with open(output_file, 'wb') as f:
+        f.write(b'\xef\xbb\xbf')
+        f.write(html_content.encode('utf-8'))
+
+
 def export_to_html(data, output_file):
     """Export results to HTML format - maintains your exact original HTML structure and styling."""
     mode_description = {
@@ -207,6 +510,9 @@ def export_to_html(data, output_file):
         'proxy_advanced': "Proxy Advanced (comparing video files by basename and frame count)"
     }.get(data['mode'], data['mode'])
     
+    if 'groups' in data:
+        return _export_groups_to_html(data, output_file, mode_description)
+    
     # Format directory lists
     def format_dirs_html(dirs):
         if len(dirs) == 1:
@@ -218,6 +524,21 @@ def export_to_html(data, output_file):
     dirs1_html = format_dirs_html(data.get('dirs1', [data['path1']]))
     dirs2_html = format_dirs_html(data.get('dirs2', [data['path2']]))
     
+    # Unique file rows - folder entries when rolled up
+    def format_unique_rows(css_class, files, rollup):
+        if rollup is None:
+            return ''.join(f'<tr class="{css_class}"><td>{html.escape(f)}</td></tr>' for f in sorted(files))
+        return ''.join(
+            f'<tr class="{css_class} folder"><td>{html.escape(entry["path"] + os.sep)}</td>'
+            f'<td>{entry["files"]:,} files, {_format_size(entry["size"])}</td></tr>'
+            if entry['is_folder'] else
+            f'<tr class="{css_class}"><td>{html.escape(entry["path"])}</td><td></td></tr>'
+            for entry in rollup)
+    
+    table_header = '<tr><th>Path</th><th>Missing Folder Contents</th></tr>' if 'rollup1' in data else '<tr><th>File Path</th></tr>'
+    unique1_rows = format_unique_rows('path1', data['unique1'], data.get('rollup1'))
+    unique2_rows = format_unique_rows('path2', data['unique2'], data.get('rollup2'))
+    
     # Frame mismatches section - only show in proxy_advanced mode
     mismatch_html = ""
     if data['mode'] == 'proxy_advanced':
@@ -264,6 +585,70 @@ def export_to_html(data, output_file):
         </div>
         '''
     
+    # Checksum section - only when group 1 came from checksum manifests
+    checksum_html = ""
+    if 'checksum_mismatches' in data:
+        summary = data['checksum_summary']
+        summary_text = (f"{summary['trusted']:,} trusted (size and mtime match), "
+                        f"{summary['verified']:,} verified by checksum, "
+                        f"{summary['unverifiable']:,} could not be verified")
+        if data['checksum_mismatches']:
+            checksum_rows = ''.join(f'''
+            <tr class="mismatch">
+                <td>{html.escape(mismatch['path2'])}</td>
+                <td>{html.escape(mismatch['reason'])}</td>
+                <td>{html.escape(mismatch['algorithm'])}</td>
+                <td>{html.escape(mismatch['expected'])}</td>
+                <td>{html.escape(mismatch['actual'] or '')}</td>
+            </tr>
+        ''' for mismatch in data['checksum_mismatches'])
+            
+            checksum_html = f'''
+        <div class="section">
+            <div class="warning-box">
+                <h3>⚠️ Checksum Mismatches ({len(data['checksum_mismatches'])} files)</h3>
+                <p>{summary_text}. These files do not match the manifest:</p>
+            </div>
+            <table>
+                <tr><th>File (Group 2)</th><th>Reason</th><th>Algorithm</th><th>Expected</th><th>Actual</th></tr>
+                {checksum_rows}
+            </table>
+        </div>
+        '''
+        else:
+            checksum_html = f'''
+        <div class="section">
+            <div class="warning-box" style="background-color: #d4edda; border-color: #c3e6cb;">
+                <h3 style="color: #155724;">✅ Checksum Mismatches (0 files)</h3>
+                <p>{summary_text}</p>
+            </div>
+        </div>
+        '''
+    
+    # Likely renames/moves section - only when rename detection was requested
+    rename_html = ""
+    if 'renames' in data:
+        rename_rows = ''.join(f'''
+            <tr class="rename">
+                <td>{html.escape(rename['path1'])}</td>
+                <td>{html.escape(rename['path2'])}</td>
+                <td>{rename['size']:,}</td>
+            </tr>
+        ''' for rename in data['renames'])
+        
+        rename_html = f'''
+    <div class="section">
+        <div class="path-header">
+            <h3>Likely renamed/moved files: ({len(data['renames'])} pairs)</h3>
+            <p>These files have the same size and content fingerprint but different names or locations:</p>
+        </div>
+        <table>
+            <tr><th>Path (Group 1)</th><th>Path (Group 2)</th><th>Size (bytes)</th></tr>
+            {rename_rows}
+        </table>
+    </div>
+    '''
+    
     html_content = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -282,14 +667,18 @@ def export_to_html(data, output_file):
     
     {mismatch_html}
     
+    {checksum_html}
+    
+    {rename_html}
+    
     <div class="section">
         <div class="path-header">
             <h3>Files only in first group: ({len(data['unique1'])} files)</h3>
             {dirs1_html}
         </div>
         <table>
-            <tr><th>File Path</th></tr>
-            {''.join(f'<tr class="path1"><td>{html.escape(f)}</td></tr>' for f in sorted(data['unique1']))}
+            {table_header}
+            {unique1_rows}
         </table>
     </div>
     
@@ -299,8 +688,8 @@ def export_to_html(data, output_file):
             {dirs2_html}
         </div>
         <table>
-            <tr><th>File Path</th></tr>
-            {''.join(f'<tr class="path2"><td>{html.escape(f)}</td></tr>' for f in sorted(data['unique2']))}
+            {table_header}
+            {unique2_rows}
         </table>
     </div>
 </body>
@@ -311,4 +700,119 @@ def export_to_html(data, output_file):
         # Write UTF-8 BOM
         f.write(b'\xef\xbb\xbf')
         # Write content as UTF-8
-        f.write(html_content.encode('utf-8'))
\ No newline at end of file
+        f.write(html_content.encode('utf-8'))
+
+
+def _executemany_batched(cursor, sql, rows):
+    """Insert rows from any iterable in fixed-size executemany batches."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, SQLITE_BATCH_SIZE))
+        if not batch:
+            break
+        cursor.executemany(sql, batch)
+
+
+def export_to_sqlite(data, output_file):
+    """Export results to an indexed SQLite database for ad-hoc queries."""
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    
+    if 'groups' in data:
+        groups = [(group['path'], group['dirs']) for group in data['groups']]
+    else:
+        groups = [(data['path1'], data.get('dirs1', [data['path1']])),
+                  (data['path2'], data.get('dirs2', [data['path2']]))]
+    
+    # Autocommit mode so the whole export runs in our single explicit transaction
+    conn = sqlite3.connect(output_file, isolation_level=None)
+    try:
+        # Fresh file written in one go: no rollback journal or fsync needed
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        
+        for statement in _SQLITE_TABLES:
+            cursor.execute(statement)
+        
+        cursor.executemany('INSERT INTO run_info VALUES (?, ?)', [
+            ('mode', data['mode']),
+            ('comparison_time', datetime.now().isoformat()),
+            ('group_count', str(len(groups)))
+        ])
+        cursor.executemany('INSERT INTO groups VALUES (?, ?, ?)', [
+            (index, path, json.dumps(dirs, ensure_ascii=False))
+            for index, (path, dirs) in enumerate(groups, 1)
+        ])
+        
+        if 'groups' in data:
+            _executemany_batched(cursor, 'INSERT INTO presence VALUES (?, ?, ?, ?)', (
+                (row['key'], index, path is not None, path)
+                for row in data['presence']
+                for index, path in enumerate(row['paths'], 1)
+            ))
+            # Only keys held by a single group are unique; partial presence stays in presence
+            _executemany_batched(cursor, 'INSERT INTO unique_files VALUES (?, ?, ?, ?)', (
+                (index, os.path.dirname(path), os.path.basename(path), path)
+                for row in data['presence']
+                if sum(path is not None for path in row['paths']) == 1
+                for index, path in enumerate(row['paths'], 1)
+                if path is not None
+            ))
+            mismatches = (
+                (mismatch['basename'], index, file, frames, mismatch['difference'], path)
+                for mismatch in data.get('frame_mismatches', [])
+                for index, (file, frames, path) in enumerate(
+                    zip(mismatch['files'], mismatch['frames'], mismatch['paths']), 1)
+                if file is not None
+            )
+        else:
+            _executemany_batched(cursor, 'INSERT INTO unique_files VALUES (?, ?, ?, ?)', (
+                (index, os.path.dirname(path), os.path.basename(path), path)
+                for index, key in ((1, 'unique1'), (2, 'unique2'))
+                for path in data[key]
+            ))
+            mismatches = (
+                row
+                for mismatch in data.get('frame_mismatches', [])
+                for row in ((mismatch['basename'], 1, mismatch['file1'], mismatch['frames1'],
+                             mismatch['difference'], mismatch['path1']),
+                            (mismatch['basename'], 2, mismatch['file2'], mismatch['frames2'],
+                             mismatch['difference'], mismatch['path2']))
+            )
+        _executemany_batched(cursor, 'INSERT INTO frame_mismatches VALUES (?, ?, ?, ?, ?, ?)', mismatches)
+        
+        if 'renames' in data:
+            _executemany_batched(cursor, 'INSERT INTO renames VALUES (?, ?, ?)', (
+                (rename['path1'], rename['path2'], rename['size']) for rename in data['renames']
+            ))
+        
+        if 'checksum_mismatches' in data:
+            cursor.executemany('INSERT INTO run_info VALUES (?, ?)', [
+                (f'checksums_{name}', str(count)) for name, count in data['checksum_summary'].items()
+            ])
+            _executemany_batched(cursor, 'INSERT INTO checksum_mismatches VALUES (?, ?, ?, ?, ?, ?, ?)', (
+                (mismatch['key'], mismatch['reason'], mismatch['algorithm'], mismatch['expected'],
+                 mismatch['actual'], mismatch['path1'], mismatch['path2'])
+                for mismatch in data['checksum_mismatches']
+            ))
+        
+        if 'rollup1' in data:
+            _executemany_batched(cursor, 'INSERT INTO rollup VALUES (?, ?, ?, ?, ?)', (
+                (index, entry['path'], entry['is_folder'], entry['files'], entry['size'])
+                for index, key in ((1, 'rollup1'), (2, 'rollup2'))
+                for entry in data[key]
+            ))
+        
+        # Build indexes after the bulk load - much faster than maintaining them per row
+        for statement in _SQLITE_INDEXES:
+            cursor.execute(statement)
+        cursor.execute('COMMIT')
+    except BaseException:
+        # Without a rollback journal a failed export cannot be undone, so drop the file
+        conn.close()
+        os.remove(output_file)
+        raise
+    finally:
+        conn.close()
@@ -16,7 +16,11 @@ def should_skip_file(filename):
         'desktop.ini'   # Windows folder settings
     ]
     
-    return any(filename.startswith(pattern) for pattern in skip_patterns)
+    # Checksum manifests and sidecars (ASC MHL, .md5, .xxh64, ...)
+    skip_extensions = ('.mhl', '.md5', '.sha1', '.sha256', '.xxh64', '.xxh128', '.xxh3')
+    
+    return (any(filename.startswith(pattern) for pattern in skip_patterns)
+            or filename.lower().endswith(skip_extensions))
 
 def should_skip_directory(dirname):
     """Check if a directory name should be skipped"""
@@ -25,7 +29,8 @@ def should_skip_directory(dirname):
         'System Volume Information',  # Windows system folder
         '.Trash',        # Linux/macOS trash
         '@eaDir',        # Synology NAS system folder
-        '#recycle'       # Some NAS systems recycle folder
+        '#recycle',      # Some NAS systems recycle folder
+        'ascmhl'         # ASC MHL manifest history folder
     ]
     
     return dirname in skip_directories
@@ -37,7 +42,8 @@ def should_skip_path(path):
         'System Volume Information',  # Windows system folder
         '.Trash',        # Linux/macOS trash
         '@eaDir',        # Synology NAS system folder
-        '#recycle'       # Some NAS systems recycle folder
+        '#recycle',      # Some NAS systems recycle folder
+        'ascmhl'         # ASC MHL manifest history folder
     ]
     
     path_parts = path.split(os.sep)
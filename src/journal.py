@@ -0,0 +1,136 @@
+import os
+import json
+import threading
+
+class ScanJournal:
+    """
+    Append-only on-disk journal of completed walks and probes.
+
+    Every completed directory walk and every successful probe is written as one
+    JSON line as soon as it finishes, so a killed run can be resumed from the
+    journal. Probe results are only reused while the file's size and mtime are
+    unchanged. Writes are serialized with a lock, so probe workers can record
+    results concurrently.
+    """
+
+    # Force journal lines to disk every N records
+    SYNC_INTERVAL = 100
+
+    def __init__(self, journal_path, resume=False):
+        """
+        Args:
+            journal_path: Journal file (JSON lines)
+            resume: Load completed work from an existing journal and append to it
+        """
+        self.journal_path = journal_path
+        self.walks = {}
+        self.probes = {}
+        if resume:
+            self._load()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._file = open(journal_path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _load(self):
+        """Read completed work; a line cut short by a crash is ignored"""
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('type') == 'walk':
+                    self.walks[record['root']] = (record['files'], record.get('exclude', []),
+                                                  record.get('counts'))
+                elif record.get('type') == 'probe':
+                    self.probes[record['path']] = record
+
+    def _append(self, record):
+        """Write one record as a single line"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.SYNC_INTERVAL:
+                os.fsync(self._file.fileno())
+                self._pending = 0
+
+    def get_walk(self, root, exclude=()):
+        """
+        Return (files dictionary, {directory: files listed}) of a completed walk
+        with the same exclude set, or None
+        """
+        walk = self.walks.get(os.path.abspath(root))
+        if walk is None:
+            return None
+        files, walk_exclude, counts = walk
+        # A walk that pruned other subtrees is missing their files
+        if set(walk_exclude) != set(exclude) or counts is None:
+            return None
+        return ({key: {'path': path, 'frame_count': None, 'filename': filename}
+                 for key, path, filename in files}, counts)
+
+    def record_walk(self, root, files_dict, exclude=(), counts=None):
+        """
+        Record a completed walk of root that did not descend into exclude,
+        with the number of files listed per directory
+        """
+        files = [[key, info['path'], info['filename']] for key, info in files_dict.items()]
+        root = os.path.abspath(root)
+        exclude = sorted(exclude)
+        counts = counts or {}
+        self.walks[root] = (files, exclude, counts)
+        self._append({'type': 'walk', 'root': root, 'files': files, 'exclude': exclude,
+                      'counts': counts})
+
+    def get_probe(self, path):
+        """Return (True, frame_count) if path was probed and has not changed since"""
+        record = self.probes.get(path)
+        if record is None:
+            return False, None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False, None
+        if stat.st_size != record['size'] or stat.st_mtime != record['mtime']:
+            return False, None
+        return True, record['frame_count']
+
+    def record_probe(self, path, frame_count):
+        """Record a successful probe; failures are retried on resume"""
+        if frame_count is None:
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        record = {'type': 'probe', 'path': path, 'size': stat.st_size,
+                  'mtime': stat.st_mtime, 'frame_count': frame_count}
+        with self._lock:
+            self.probes[path] = record
+        self._append(record)
+
+    def compact(self):
+        """Rewrite the journal with one record per walk root and per probed file"""
+        with self._lock:
+            self._file.close()
+            temp_path = self.journal_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for root, (files, exclude, counts) in self.walks.items():
+                    f.write(json.dumps({'type': 'walk', 'root': root, 'files': files,
+                                        'exclude': exclude, 'counts': counts},
+                                       ensure_ascii=False) + '\n')
+                for record in self.probes.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.journal_path)
+            self._file = open(self.journal_path, 'a', encoding='utf-8')
+
+    def close(self):
+        """Flush and close the journal file"""
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
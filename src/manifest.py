@@ -0,0 +1,292 @@
+import os
+import re
+import hashlib
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from src.file_utils import get_video_extensions, should_skip_file, should_skip_directory, should_skip_path
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+MANIFEST_EXTENSIONS = ('.mhl', '.md5', '.sha1', '.sha256', '.xxh64', '.xxh128', '.xxh3')
+
+# Preferred order when a manifest lists several hashes for one file
+HASH_ALGORITHMS = ('xxh64', 'xxh128', 'xxh3', 'md5', 'sha1', 'sha256')
+
+# Legacy MHL v1 element names for each algorithm
+MHL_HASH_TAGS = {
+    'xxhash64be': 'xxh64', 'xxhash64': 'xxh64', 'xxh64': 'xxh64',
+    'xxh128': 'xxh128', 'xxh3': 'xxh3',
+    'md5': 'md5', 'sha1': 'sha1', 'sha256': 'sha256'
+}
+
+# Filesystems such as FAT/exFAT store modification times with 2 second precision
+MTIME_TOLERANCE = 2
+
+class ManifestError(Exception):
+    """Raised when a reference path yields no manifests or no usable entries"""
+
+def is_manifest(path):
+    """Check if a path is a checksum manifest or sidecar file"""
+    return path.lower().endswith(MANIFEST_EXTENSIONS)
+
+def find_manifests(path):
+    """
+    Return the manifests for a reference group path: the file itself, or every
+    manifest and per-clip sidecar (clip.mov.md5) in a directory tree, including
+    the ascmhl/ folders. System directories are skipped as in a scan.
+    """
+    if os.path.isfile(path):
+        return [path]
+
+    manifests = []
+    for root, dirs, files in os.walk(path):
+        # ascmhl/ is a skipped directory for scans; its manifests are read below
+        dirs[:] = sorted(d for d in dirs if not should_skip_directory(d))
+        if should_skip_path(root):
+            continue
+        manifests.extend(os.path.join(root, name) for name in sorted(files) if is_manifest(name))
+
+        history = os.path.join(root, 'ascmhl')
+        if os.path.isdir(history):
+            manifests.extend(os.path.join(history, name) for name in sorted(os.listdir(history))
+                             if is_manifest(name) and os.path.isfile(os.path.join(history, name)))
+    return manifests
+
+def _parse_date(value):
+    """Parse an ISO 8601 date into a POSIX timestamp, or None"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip().replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+def _local_name(tag):
+    """Strip the XML namespace from a tag"""
+    return tag.rsplit('}', 1)[-1].lower()
+
+def parse_mhl(manifest_path):
+    """
+    Yield entries from an ASC MHL (v2) or legacy MHL (v1) file.
+    v2 paths are relative to the folder holding ascmhl/, v1 paths to the .mhl file.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    if os.path.basename(base).lower() == 'ascmhl':
+        base = os.path.dirname(base)
+
+    # Stream the XML so huge manifests never have to be held in memory
+    for _, element in ET.iterparse(manifest_path, events=('end',)):
+        if _local_name(element.tag) != 'hash':
+            continue
+
+        entry = {'path': None, 'size': None, 'mtime': None, 'hashes': {}}
+        for child in element:
+            name = _local_name(child.tag)
+            text = (child.text or '').strip()
+            if name in ('path', 'file'):
+                entry['path'] = text
+                if child.get('size'):
+                    entry['size'] = int(child.get('size'))
+                if child.get('lastmodificationdate'):
+                    entry['mtime'] = _parse_date(child.get('lastmodificationdate'))
+            elif name == 'size' and text:
+                entry['size'] = int(text)
+            elif name == 'lastmodificationdate':
+                entry['mtime'] = _parse_date(text)
+            elif name in MHL_HASH_TAGS and text:
+                entry['hashes'][MHL_HASH_TAGS[name]] = text.lower()
+        element.clear()
+
+        if entry['path'] and entry['hashes']:
+            entry['path'] = os.path.join(base, *entry['path'].replace('\\', '/').split('/'))
+            yield entry
+
+_BSD_LINE = re.compile(r'^(MD5|SHA1|SHA256|XXH64|XXH128|XXH3)\s*\((.+)\)\s*=\s*([0-9a-fA-F]+)$')
+_GNU_LINE = re.compile(r'^([0-9a-fA-F]+)\s+\*?(.+)$')
+
+def parse_checksum_file(manifest_path):
+    """
+    Yield entries from a .md5/.sha1/.xxh64-style file. Accepts GNU
+    ('<hash>  <path>'), BSD ('MD5 (<path>) = <hash>') and single-hash
+    sidecars named after their file (clip.mov.md5 holding only the hash).
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    stem, extension = os.path.splitext(manifest_path)
+    algorithm = extension.lower().lstrip('.')
+
+    with open(manifest_path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(('#', ';')):
+                continue
+
+            match = _BSD_LINE.match(line)
+            if match:
+                line_algorithm, path, digest = match.groups()
+                algorithm = line_algorithm.lower()
+            else:
+                match = _GNU_LINE.match(line)
+                if match:
+                    digest, path = match.groups()
+                elif re.fullmatch(r'[0-9a-fA-F]+', line):
+                    digest, path = line, os.path.basename(stem)
+                else:
+                    continue
+
+            yield {
+                'path': os.path.join(base, *path.strip().replace('\\', '/').split('/')),
+                'size': None,
+                'mtime': None,
+                'hashes': {algorithm: digest.lower()}
+            }
+
+def _get_hasher(algorithm):
+    """Return a new hash object for an algorithm, or None if it is unavailable"""
+    if algorithm in ('md5', 'sha1', 'sha256'):
+        return hashlib.new(algorithm)
+    if xxhash is None:
+        return None
+    return {'xxh64': xxhash.xxh64, 'xxh128': xxhash.xxh3_128, 'xxh3': xxhash.xxh3_64}[algorithm]()
+
+def _iter_manifest_entries(manifests, mode):
+    """Yield (key, entry) for every manifest entry a scan in this mode would list"""
+    video_extensions = get_video_extensions()
+
+    for manifest in manifests:
+        entries = parse_mhl(manifest) if manifest.lower().endswith('.mhl') else parse_checksum_file(manifest)
+        for entry in entries:
+            directory, file = os.path.split(entry['path'])
+            if should_skip_file(file) or should_skip_path(directory):
+                continue
+
+            if mode == 'proxy':
+                if os.path.splitext(file)[1].lower() not in video_extensions:
+                    continue
+                yield os.path.splitext(file)[0], entry
+            else:
+                yield file, entry
+
+def get_manifest_dict(path, mode, counts=None):
+    """
+    Build a files dictionary from manifests instead of walking the tree.
+
+    Args:
+        path: Manifest file, or directory holding manifests (top level or ascmhl/)
+        mode: 'normal' (key is the filename) or 'proxy' (key is the video basename)
+        counts: Optional dictionary receiving {directory: number of files listed},
+                including files with duplicate keys
+
+    Returns:
+        dict: key -> {path, size, mtime, algorithm, digest}
+
+    Raises:
+        ManifestError: If path holds no manifests, or they list no file for this mode
+    """
+    manifests = find_manifests(path)
+    if not manifests:
+        raise ManifestError(f"No checksum manifests found in reference path: {path}")
+
+    files_dict = {}
+
+    for key, entry in _iter_manifest_entries(manifests, mode):
+        if counts is not None:
+            folder = os.path.dirname(entry['path'])
+            counts[folder] = counts.get(folder, 0) + 1
+
+        # If key already exists, keep the first occurrence
+        if key in files_dict:
+            continue
+
+        # Prefer a hash we are able to recompute
+        algorithm = next((a for a in HASH_ALGORITHMS
+                          if a in entry['hashes'] and _get_hasher(a) is not None),
+                         next(iter(entry['hashes'])))
+
+        files_dict[key] = {
+            'path': entry['path'],
+            'size': entry['size'],
+            'mtime': entry['mtime'],
+            'algorithm': algorithm,
+            'digest': entry['hashes'][algorithm]
+        }
+
+    if not files_dict:
+        raise ManifestError(f"No usable entries in the manifests of reference path: {path}")
+    return files_dict
+
+def compute_checksum(file_path, algorithm, chunk_size=1024 * 1024):
+    """Hash a file with the given algorithm. Returns None if unavailable or unreadable"""
+    hasher = _get_hasher(algorithm)
+    if hasher is None:
+        return None
+    try:
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                hasher.update(chunk)
+    except OSError:
+        return None
+    return hasher.hexdigest()
+
+def verify_against_manifest(reference, files, get_path, scheduler):
+    """
+    Check the files of the other group against the reference manifest entries.
+
+    Files whose size and mtime agree with the manifest are trusted without being
+    read. Only the remaining files are hashed, through the per-device scheduler.
+
+    Args:
+        reference: Dictionary from get_manifest_dict()
+        files: Files dictionary of the other group
+        get_path: Function returning the full path of a files dictionary value
+        scheduler: ProbeScheduler used to run the checksums
+
+    Returns:
+        tuple: (checksum_mismatches, summary) where summary counts
+               trusted, verified and unverifiable files
+    """
+    summary = {'trusted': 0, 'verified': 0, 'unverifiable': 0}
+    mismatches = []
+    to_hash = []
+
+    for key in reference.keys() & files.keys():
+        entry = reference[key]
+        path = get_path(files[key])
+        try:
+            stat = os.stat(path)
+        except OSError:
+            summary['unverifiable'] += 1
+            continue
+
+        if entry['size'] is not None and entry['size'] != stat.st_size:
+            mismatches.append({'key': key, 'path1': entry['path'], 'path2': path,
+                               'algorithm': entry['algorithm'], 'expected': entry['digest'],
+                               'actual': None, 'reason': 'size differs'})
+        elif (entry['size'] is not None and entry['mtime'] is not None
+                and abs(entry['mtime'] - stat.st_mtime) <= MTIME_TOLERANCE):
+            summary['trusted'] += 1
+        elif _get_hasher(entry['algorithm']) is None:
+            summary['unverifiable'] += 1
+        else:
+            to_hash.append((key, path))
+
+    if to_hash:
+        print(f"  Verifying {len(to_hash)} checksums...")
+        algorithms = {path: reference[key]['algorithm'] for key, path in to_hash}
+        checksums = scheduler.run(list(algorithms), lambda path: compute_checksum(path, algorithms[path]))
+
+        for key, path in to_hash:
+            entry = reference[key]
+            actual = checksums.get(path)
+            if actual is None:
+                summary['unverifiable'] += 1
+            elif actual == entry['digest']:
+                summary['verified'] += 1
+            else:
+                mismatches.append({'key': key, 'path1': entry['path'], 'path2': path,
+                                   'algorithm': entry['algorithm'], 'expected': entry['digest'],
+                                   'actual': actual, 'reason': 'checksum differs'})
+
+    return sorted(mismatches, key=lambda x: x['key']), summary
@@ -1,13 +1,27 @@
 import os
 from src.file_utils import should_skip_file, should_skip_directory, should_skip_path
+from src.archive_utils import is_archive, iter_archive_files
 
-def get_files_dict(directory):
-    """Get dictionary of files with full filename as key and full path as value"""
+def get_files_dict(directory, exclude=(), counts=None):
+    """
+    Get dictionary of files with full filename as key and full path as value, not descending into exclude
+    If counts is given, it receives {directory: number of files listed}, including files with duplicate keys
+    """
     files_dict = {}
     
+    # Archives are listed member by member without extracting them
+    if is_archive(directory):
+        for file, full_path in iter_archive_files(directory):
+            files_dict[file] = full_path
+            if counts is not None:
+                folder = os.path.dirname(full_path)
+                counts[folder] = counts.get(folder, 0) + 1
+        return files_dict
+    
     for root, dirs, files in os.walk(directory):
-        # Skip system directories by modifying dirs in-place
-        dirs[:] = [d for d in dirs if not should_skip_directory(d)]
+        # Skip system directories (and roots walked separately) by modifying dirs in-place
+        dirs[:] = [d for d in dirs if not should_skip_directory(d)
+                   and os.path.join(root, d) not in exclude]
         
         # Skip if current path contains any system directories
         if should_skip_path(root):
@@ -20,5 +34,7 @@ def get_files_dict(directory):
             full_path = os.path.join(root, file)
             # Use full filename (with extension) as key
             files_dict[file] = full_path
+            if counts is not None:
+                counts[root] = counts.get(root, 0) + 1
     
     return files_dict
\ No newline at end of file
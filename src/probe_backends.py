@@ -0,0 +1,317 @@
+import os
+import json
+import time
+import struct
+import platform
+import threading
+import subprocess
+from fractions import Fraction
+from src.file_utils import get_video_extensions, get_video_frame_count, check_mediainfo_installed
+
+class ProbeBackend:
+    """
+    Base class for frame count probe backends.
+    Subclasses set name and extensions and implement is_available/get_frame_count.
+    """
+    name = None
+    extensions = frozenset()
+
+    def supports(self, extension):
+        """Check if the backend can probe files with this container extension"""
+        return extension in self.extensions
+
+    def is_available(self):
+        """Check if the backend can run on this host"""
+        raise NotImplementedError
+
+    def get_frame_count(self, video_path):
+        """Return the frame count of the first video track, or None"""
+        raise NotImplementedError
+
+class MediainfoBackend(ProbeBackend):
+    """Probe through the mediainfo CLI"""
+    name = 'mediainfo'
+    extensions = frozenset(get_video_extensions())
+
+    def is_available(self):
+        return check_mediainfo_installed()
+
+    def get_frame_count(self, video_path):
+        return get_video_frame_count(video_path)
+
+class FfprobeBackend(ProbeBackend):
+    """Probe through the ffprobe CLI (part of FFmpeg)"""
+    name = 'ffprobe'
+    extensions = frozenset(get_video_extensions())
+
+    def is_available(self):
+        try:
+            subprocess.run(['ffprobe', '-version'],
+                          capture_output=True,
+                          check=True,
+                          timeout=5)
+            return True
+        except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+            return False
+
+    def get_frame_count(self, video_path):
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'stream=nb_frames,duration,r_frame_rate',
+                 '-of', 'json', video_path],
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                timeout=30,
+                check=True
+            )
+            streams = json.loads(result.stdout).get('streams', [])
+            if not streams:
+                return None
+            stream = streams[0]
+
+            frame_count = stream.get('nb_frames')
+            if frame_count and frame_count != 'N/A':
+                return int(frame_count)
+
+            # Alternative: calculate from duration and frame rate
+            duration = stream.get('duration')
+            frame_rate = stream.get('r_frame_rate')
+            if duration and frame_rate and duration != 'N/A':
+                return int(float(duration) * Fraction(frame_rate))
+            return None
+
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired,
+                json.JSONDecodeError, FileNotFoundError, ValueError, ZeroDivisionError) as e:
+            print(f"  Warning: Could not get frame count for {os.path.basename(video_path)}: {str(e)}")
+            return None
+
+class NativeBackend(ProbeBackend):
+    """
+    In-process parser for ISO base media files (MP4/MOV family).
+    Reads only the box headers and the moov box, and returns the sample count
+    of the first video track's sample size table (one sample per frame).
+    """
+    name = 'native'
+    extensions = frozenset({'.mp4', '.mov', '.m4v', '.qt', '.3gp', '.3g2', '.f4v'})
+
+    # Boxes that only contain other boxes on the way to stsz/hdlr
+    CONTAINER_BOXES = {b'trak', b'mdia', b'minf', b'stbl'}
+
+    def is_available(self):
+        return True
+
+    @staticmethod
+    def _iter_boxes(data, start=0, end=None):
+        """Yield (type, payload_start, payload_end) for the boxes in data[start:end]"""
+        end = len(data) if end is None else end
+        offset = start
+        while offset + 8 <= end:
+            size, box_type = struct.unpack('>I4s', data[offset:offset + 8])
+            header = 8
+            if size == 1:
+                if offset + 16 > end:
+                    return
+                size = struct.unpack('>Q', data[offset + 8:offset + 16])[0]
+                header = 16
+            elif size == 0:
+                size = end - offset
+            if size < header or offset + size > end:
+                return
+            yield box_type, offset + header, offset + size
+            offset += size
+
+    def _read_moov(self, f):
+        """Seek from box header to box header and return the moov payload"""
+        file_size = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            header = f.read(16)
+            if len(header) < 8:
+                return None
+            size, box_type = struct.unpack('>I4s', header[:8])
+            header_size = 8
+            if size == 1:
+                size = struct.unpack('>Q', header[8:16])[0]
+                header_size = 16
+            elif size == 0:
+                size = file_size - offset
+            if size < header_size:
+                return None
+            if box_type == b'moov':
+                f.seek(offset + header_size)
+                return f.read(size - header_size)
+            offset += size
+        return None
+
+    def _track_frame_count(self, data, start, end):
+        """Return the stsz/stz2 sample count of a trak if it is a video track"""
+        handler = None
+        sample_count = None
+        stack = [(start, end, b'trak')]
+        while stack:
+            box_start, box_end, parent = stack.pop()
+            for box_type, payload_start, payload_end in self._iter_boxes(data, box_start, box_end):
+                if box_type in self.CONTAINER_BOXES:
+                    stack.append((payload_start, payload_end, box_type))
+                elif box_type == b'hdlr' and parent == b'mdia':
+                    # Only mdia/hdlr names the media type; QuickTime also puts a
+                    # data handler hdlr (dhlr/alis) inside minf
+                    # version/flags(4) + pre_defined(4) + handler_type(4)
+                    handler = data[payload_start + 8:payload_start + 12]
+                elif box_type in (b'stsz', b'stz2'):
+                    # version/flags(4) + sample_size or field_size(4) + sample_count(4)
+                    sample_count = struct.unpack('>I', data[payload_start + 8:payload_start + 12])[0]
+        if handler == b'vide' and sample_count:
+            return sample_count
+        return None
+
+    def get_frame_count(self, video_path):
+        try:
+            with open(video_path, 'rb') as f:
+                moov = self._read_moov(f)
+            if not moov:
+                return None
+            for box_type, payload_start, payload_end in self._iter_boxes(moov):
+                if box_type == b'trak':
+                    frame_count = self._track_frame_count(moov, payload_start, payload_end)
+                    if frame_count:
+                        return frame_count
+            return None
+        except (OSError, struct.error):
+            return None
+
+PROBE_BACKENDS = [NativeBackend(), MediainfoBackend(), FfprobeBackend()]
+
+def get_route_cache_file():
+    """Location of the per-host benchmark results"""
+    return os.path.join(os.path.expanduser('~'), '.file_compare', 'probe_routes.json')
+
+class ProbeRouter:
+    """
+    Routes each container extension to the fastest available backend that supports it.
+
+    The first BENCHMARK_FILES files of an extension seen on a host are probed by
+    every available backend (a micro-benchmark), and the backend that reads the most
+    of them, fastest, becomes the route. Routes are saved per host name in
+    get_route_cache_file(). Until the route is known, and when no backend could
+    read any sample, files are probed by trying the backends in order. If the
+    routed backend cannot read a file, the other backends are tried in turn.
+    """
+
+    # Files timed per extension before a route is chosen
+    BENCHMARK_FILES = 3
+
+    def __init__(self, backend_name=None, cache_file=None):
+        """
+        Args:
+            backend_name: Force a single backend by name (None or 'auto' benchmarks)
+            cache_file: Where to store benchmark results (default: get_route_cache_file())
+        """
+        self.backends = [backend for backend in PROBE_BACKENDS if backend.is_available()]
+        if backend_name and backend_name != 'auto':
+            self.backends = [backend for backend in self.backends if backend.name == backend_name]
+        self.forced = bool(backend_name and backend_name != 'auto')
+        self.cache_file = cache_file or get_route_cache_file()
+        self.host = platform.node()
+        self.routes = self._load_routes()
+        self._benchmarks = {}
+        self._lock = threading.Lock()
+
+    def is_available(self):
+        """Check if at least one backend can run"""
+        return bool(self.backends)
+
+    def _load_routes(self):
+        """Load this host's saved routes, dropping backends no longer available"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                routes = json.load(f).get(self.host, {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+        names = {backend.name for backend in self.backends}
+        return {ext: name for ext, name in routes.items() if name in names}
+
+    def _save_routes(self):
+        """Merge this host's routes into the cache file"""
+        try:
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    all_routes = json.load(f)
+            except (OSError, ValueError):
+                all_routes = {}
+            all_routes[self.host] = self.routes
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(all_routes, f, indent=4)
+        except OSError as e:
+            print(f"  Warning: Could not save probe routes: {str(e)}")
+
+    def _benchmark(self, extension, video_path, candidates):
+        """Time every candidate on one sample file, choosing the route after the last sample"""
+        # An untimed pass first warms the page cache for every backend, so the
+        # first backend timed does not pay the cold read for all of them
+        results = {backend.name: backend.get_frame_count(video_path) for backend in candidates}
+
+        timings = {}
+        for backend in candidates:
+            if results[backend.name] is None:
+                continue
+            started = time.perf_counter()
+            backend.get_frame_count(video_path)
+            timings[backend.name] = time.perf_counter() - started
+
+        with self._lock:
+            benchmark = self._benchmarks[extension]
+            for name, elapsed in timings.items():
+                reads, total = benchmark['timings'].get(name, (0, 0.0))
+                benchmark['timings'][name] = (reads + 1, total + elapsed)
+            benchmark['finished'] += 1
+            if benchmark['finished'] == self.BENCHMARK_FILES:
+                self._choose_route(extension, benchmark['timings'])
+
+        return next((results[backend.name] for backend in candidates
+                     if results[backend.name] is not None), None)
+
+    def _choose_route(self, extension, timings):
+        """Route an extension to the backend that read the most samples, fastest"""
+        if not timings:
+            # Not saved: the next run benchmarks again, this one probes in order
+            print(f"  Probe route for {extension}: no backend could read the samples, "
+                  f"trying backends in order")
+            return
+        ranked = sorted(timings.items(), key=lambda item: (-item[1][0], item[1][1]))
+        self.routes[extension] = ranked[0][0]
+        print(f"  Probe route for {extension}: {self.routes[extension]} "
+              f"({', '.join(f'{name} {total / reads * 1000:.0f} ms' for name, (reads, total) in ranked)})")
+        self._save_routes()
+
+    def get_frame_count(self, video_path):
+        """Probe a file through its routed backend, falling back to the others"""
+        extension = os.path.splitext(video_path)[1].lower()
+        candidates = [backend for backend in self.backends if backend.supports(extension)]
+        if not candidates:
+            return None
+
+        if not self.forced and len(candidates) > 1 and extension not in self.routes:
+            # Claim a sample under the lock, but time it outside so other workers
+            # keep probing (in backend order) while the benchmark runs
+            with self._lock:
+                benchmark = self._benchmarks.setdefault(
+                    extension, {'started': 0, 'finished': 0, 'timings': {}})
+                sample = benchmark['started'] < self.BENCHMARK_FILES
+                if sample:
+                    benchmark['started'] += 1
+            if sample:
+                return self._benchmark(extension, video_path, candidates)
+
+        route = self.routes.get(extension)
+        candidates.sort(key=lambda backend: backend.name != route)
+        for backend in candidates:
+            frame_count = backend.get_frame_count(video_path)
+            if frame_count is not None:
+                return frame_count
+        return None
@@ -0,0 +1,110 @@
+import os
+import threading
+from collections import deque
+
+def find_mount_point(path):
+    """Return the mount point that contains path"""
+    path = os.path.abspath(path)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+class ProbeScheduler:
+    """
+    I/O-aware scheduler for per-file probe work.
+
+    Files are grouped by the device they live on (st_dev). Each device gets its
+    own queue and its own pool of workers, so a slow spinning disk or NAS is never
+    hit by more concurrent probes than its limit while the other devices keep
+    working in parallel.
+    """
+
+    def __init__(self, default_limit=2, mount_limits=None):
+        """
+        Args:
+            default_limit: Concurrent probes per device when no mount limit applies
+            mount_limits: Dictionary of {path: limit}; each path is resolved to
+                          its mount point, so any folder on a volume can be given
+        """
+        self.default_limit = default_limit
+        self.mount_limits = {}
+        for path, limit in (mount_limits or {}).items():
+            self.mount_limits[find_mount_point(path)] = limit
+        self._mount_cache = {}
+
+    def _device_for(self, path):
+        """Return (device id, mount point) for a file, caching per directory"""
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory not in self._mount_cache:
+            try:
+                device = os.stat(directory).st_dev
+            except OSError:
+                device = None
+            self._mount_cache[directory] = (device, find_mount_point(directory))
+        return self._mount_cache[directory]
+
+    def get_limit(self, mount_point):
+        """Return the concurrency limit for a mount point"""
+        return self.mount_limits.get(mount_point, self.default_limit)
+
+    def run(self, paths, probe, progress=None):
+        """
+        Run probe(path) for every path with per-device concurrency limits.
+
+        Args:
+            paths: Iterable of file paths to probe
+            probe: Function called with a single path, returning its result;
+                   a path whose probe raises gets None
+            progress: Optional function called with the number of completed probes
+
+        Returns:
+            dict: Path as key and probe result as value
+        """
+        queues = {}
+        limits = {}
+        for path in paths:
+            device, mount_point = self._device_for(path)
+            if device not in queues:
+                queues[device] = deque()
+                limits[device] = self.get_limit(mount_point)
+            queues[device].append(path)
+
+        results = {}
+        lock = threading.Lock()
+        completed = [0]
+
+        def worker(queue):
+            while True:
+                with lock:
+                    if not queue:
+                        return
+                    path = queue.popleft()
+                try:
+                    result = probe(path)
+                except Exception as e:
+                    # A failing file must not stop the rest of its device's queue
+                    print(f"  Warning: Could not probe {path}: {str(e)}")
+                    result = None
+                with lock:
+                    results[path] = result
+                    completed[0] += 1
+                    if progress:
+                        progress(completed[0])
+
+        # Start workers device by device in round-robin order so every device
+        # gets its first worker before any device gets its second
+        threads = []
+        for slot in range(max(limits.values(), default=0)):
+            for device, queue in queues.items():
+                if slot < limits[device]:
+                    thread = threading.Thread(target=worker, args=(queue,), daemon=True)
+                    thread.start()
+                    threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        return results
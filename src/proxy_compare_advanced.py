@@ -1,62 +1,145 @@
 import os
-from src.file_utils import (get_video_extensions, should_skip_file, 
-                            should_skip_directory, should_skip_path,
-                            get_video_frame_count, check_mediainfo_installed)
+from src.file_utils import (get_video_extensions, should_skip_file,
+                            should_skip_directory, should_skip_path)
+from src.probe_scheduler import ProbeScheduler
+from src.probe_backends import ProbeRouter
 
-def get_files_dict(directory):
+def _require_backend(router):
+    """Exit the run if no probe backend can run"""
+    if not router.is_available():
+        print("\nError: no probe backend is available!")
+        print("MP4/MOV files can be read by the built-in parser (--probe-backend native).")
+        print("For other containers please install mediainfo or ffprobe:")
+        print("  macOS:   brew install mediainfo    (or: brew install ffmpeg)")
+        print("  Windows: Download from https://mediaarea.net/en/MediaInfo/Download")
+        print("  Linux:   sudo apt-get install mediainfo    (or: sudo apt-get install ffmpeg)")
+        import sys
+        sys.exit(1)
+
+def probe_frame_counts(groups, scheduler=None, router=None, journal=None):
+    """
+    Fill in frame_count for every file of every group in one scheduled pass,
+    so probes on different devices run side by side.
+
+    Args:
+        groups: List of dictionaries returned by get_files_dict(..., probe=False)
+        scheduler: ProbeScheduler to use (default: 2 concurrent probes per device)
+        router: ProbeRouter to use (default: fastest available backend per container)
+        journal: Optional ScanJournal; journaled probes are skipped, new ones recorded
+    """
+    if router is None:
+        router = ProbeRouter()
+    _require_backend(router)
+    if scheduler is None:
+        scheduler = ProbeScheduler()
+
+    # The same file may be listed by several groups, or reached through hard
+    # links and symlinks; probe each (st_dev, st_ino) once
+    representatives = {}
+    aliases = {}
+    for files in groups:
+        for info in files.values():
+            path = info['path']
+            if path in aliases:
+                continue
+            try:
+                stat = os.stat(path)
+                identity = (stat.st_dev, stat.st_ino)
+            except OSError:
+                identity = path
+            aliases[path] = representatives.setdefault(identity, path)
+    paths = list(representatives.values())
+
+    frame_counts = {}
+    probe = router.get_frame_count
+    if journal is not None:
+        for path in paths:
+            done, frame_count = journal.get_probe(path)
+            if done:
+                frame_counts[path] = frame_count
+        if frame_counts:
+            print(f"  Resuming: {len(frame_counts)} videos already probed")
+        paths = [path for path in paths if path not in frame_counts]
+
+        def probe(path):
+            frame_count = router.get_frame_count(path)
+            journal.record_probe(path, frame_count)
+            return frame_count
+
+    print("  Reading video metadata (this may take a while)...")
+
+    def progress(count):
+        if count % 10 == 0:
+            print(f"    Processed {count} videos...")
+
+    frame_counts.update(scheduler.run(paths, probe, progress))
+    for files in groups:
+        for info in files.values():
+            info['frame_count'] = frame_counts.get(aliases[info['path']])
+
+    print(f"    Total: {len(frame_counts)} videos processed")
+
+def get_files_dict(directory, probe=True, scheduler=None, router=None, journal=None, exclude=(), counts=None):
     """
     Get dictionary of video files with metadata
     Returns: dict with basename as key and dict of {path, frame_count} as value
+    With probe=False frame_count is left as None for probe_frame_counts()
+    With a journal, a walk completed by an earlier run with the same exclude is reused
+    Directories in exclude are not descended into
+    If counts is given, it receives {directory: number of files listed}, including files with duplicate keys
     """
-    if not check_mediainfo_installed():
-        print("\nError: mediainfo CLI is not installed!")
-        print("Please install mediainfo:")
-        print("  macOS:   brew install mediainfo")
-        print("  Windows: Download from https://mediaarea.net/en/MediaInfo/Download")
-        print("  Linux:   sudo apt-get install mediainfo")
-        import sys
-        sys.exit(1)
-    
+    if journal is not None:
+        walk = journal.get_walk(directory, exclude)
+        if walk is not None:
+            files_dict, walk_counts = walk
+            print("  Resuming: walk already completed")
+            if counts is not None:
+                for folder, count in walk_counts.items():
+                    counts[folder] = counts.get(folder, 0) + count
+            if probe:
+                probe_frame_counts([files_dict], scheduler, router, journal)
+            return files_dict
+
     files_dict = {}
+    walk_counts = {}
     video_extensions = get_video_extensions()
-    
-    print("  Reading video metadata (this may take a while)...")
-    file_count = 0
-    
+
     for root, dirs, files in os.walk(directory):
-        # Skip system directories by modifying dirs in-place
-        dirs[:] = [d for d in dirs if not should_skip_directory(d)]
-        
+        # Skip system directories (and roots walked separately) by modifying dirs in-place
+        dirs[:] = [d for d in dirs if not should_skip_directory(d)
+                   and os.path.join(root, d) not in exclude]
+
         # Skip if current path contains any system directories
         if should_skip_path(root):
             continue
-            
+
         for file in files:
             if should_skip_file(file):
                 continue
-            
+
             # Check if it's a video file
             extension = os.path.splitext(file)[1].lower()
             if extension not in video_extensions:
                 continue
-            
+
             full_path = os.path.join(root, file)
             basename = os.path.splitext(file)[0]
-            
-            # Get frame count
-            frame_count = get_video_frame_count(full_path)
-            
-            file_count += 1
-            if file_count % 10 == 0:
-                print(f"    Processed {file_count} videos...")
-            
+
             # If basename already exists, keep the first occurrence
             if basename not in files_dict:
                 files_dict[basename] = {
                     'path': full_path,
-                    'frame_count': frame_count,
+                    'frame_count': None,
                     'filename': file
                 }
-    
-    print(f"    Total: {file_count} videos processed")
-    return files_dict
\ No newline at end of file
+            walk_counts[root] = walk_counts.get(root, 0) + 1
+
+    if journal is not None:
+        journal.record_walk(directory, files_dict, exclude, walk_counts)
+    if counts is not None:
+        for folder, count in walk_counts.items():
+            counts[folder] = counts.get(folder, 0) + count
+
+    if probe:
+        probe_frame_counts([files_dict], scheduler, router, journal)
+    return files_dict
@@ -0,0 +1,71 @@
+import os
+import hashlib
+
+def get_file_fingerprint(path, size, sample_size=4096):
+    """
+    Fingerprint a file from its size plus the first and last sample_size bytes.
+    Returns None if the file cannot be read
+    """
+    digest = hashlib.blake2b(str(size).encode('ascii'), digest_size=16)
+    try:
+        with open(path, 'rb') as f:
+            digest.update(f.read(sample_size))
+            if size > sample_size:
+                # Never re-read bytes already covered by the head sample
+                f.seek(max(size - sample_size, sample_size))
+                digest.update(f.read(sample_size))
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def _index_by_size(paths):
+    """Group paths by file size, skipping empty and unreadable files"""
+    by_size = {}
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        if size > 0:
+            by_size.setdefault(size, []).append(path)
+    return by_size
+
+def detect_renames(unique1, unique2, sample_size=4096):
+    """
+    Find likely renames/moves between files only in group 1 and files only in group 2.
+
+    Performs a hash join on (size, head-and-tail fingerprint): only files whose
+    size appears on both sides are ever opened, and each of those is read once.
+
+    Args:
+        unique1: Full paths of files only in the first group
+        unique2: Full paths of files only in the second group
+        sample_size: Number of bytes read from the head and the tail of each file
+
+    Returns:
+        list: One dict {path1, path2, size} per matched pair
+    """
+    sizes1 = _index_by_size(unique1)
+    sizes2 = _index_by_size(unique2)
+
+    renames = []
+    for size in sizes1.keys() & sizes2.keys():
+        # Build side of the join: fingerprints of group 2 candidates
+        candidates = {}
+        for path in sizes2[size]:
+            fingerprint = get_file_fingerprint(path, size, sample_size)
+            if fingerprint is not None:
+                candidates.setdefault(fingerprint, []).append(path)
+
+        # Probe side: each group 1 file claims at most one group 2 file
+        for path in sizes1[size]:
+            fingerprint = get_file_fingerprint(path, size, sample_size)
+            matches = candidates.get(fingerprint)
+            if matches:
+                renames.append({
+                    'path1': path,
+                    'path2': matches.pop(0),
+                    'size': size
+                })
+
+    return sorted(renames, key=lambda x: x['path1'])
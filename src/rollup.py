@@ -0,0 +1,86 @@
+import os
+from src.archive_utils import is_archive
+
+def _get_size(path):
+    """Return file size in bytes, or 0 if it cannot be read (e.g. archive members)"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _outermost(roots):
+    """Drop roots lying inside another root of the same group"""
+    resolved = {os.path.realpath(root) for root in roots}
+    return [root for root in resolved
+            if not any(root.startswith(other.rstrip(os.sep) + os.sep) for other in resolved)]
+
+def _iter_folders(directory, roots):
+    """Yield directory and its parents, bottom-up, stopping at its outermost scan root"""
+    while True:
+        yield directory
+        parent = os.path.dirname(directory)
+        if directory in roots or parent == directory:
+            return
+        directory = parent
+
+def build_rollup(unique_paths, counts, roots):
+    """
+    Aggregate the files only in one group into a folder tree.
+
+    A folder whose every scanned file is unique collapses into a single entry
+    (only the topmost such folder, at most the scan root, is reported). Unique files
+    in partially missing folders are listed one by one.
+
+    Args:
+        unique_paths: Full paths of the files only in this group
+        counts: {directory: files listed} from the walk of this group, including
+                files sharing a key with another one (see scan_groups())
+        roots: Directories (or archives) scanned for this group
+
+    Returns:
+        list: Sorted dicts of {path, is_folder, files, size}
+    """
+    # Scanned paths may be resolved (scan plan) or absolute (manifests); match both.
+    # A manifest file root stands for the folder holding it
+    folders = [os.path.dirname(os.path.abspath(root)) if os.path.isfile(root) and not is_archive(root)
+               else root for root in roots]
+    # Parents are only cut at the outermost roots, so nested roots roll up into them
+    outermost = set(_outermost(folders))
+    roots = set(outermost)
+    for root in folders:
+        if os.path.realpath(root) in outermost:
+            roots.update((os.path.normpath(root), os.path.abspath(root)))
+
+    totals = {}
+    for folder, count in counts.items():
+        for directory in _iter_folders(os.path.normpath(folder), roots):
+            totals[directory] = totals.get(directory, 0) + count
+
+    unique_counts = {}
+    unique_sizes = {}
+    files = []
+    for path in unique_paths:
+        path = os.path.normpath(path)
+        size = _get_size(path)
+        parents = list(_iter_folders(os.path.dirname(path), roots))
+        for directory in parents:
+            unique_counts[directory] = unique_counts.get(directory, 0) + 1
+            unique_sizes[directory] = unique_sizes.get(directory, 0) + size
+        files.append((path, size, parents))
+
+    entries = {}
+    for path, size, parents in files:
+        # Topmost fully missing folder, up to and including the scan root
+        folder = None
+        for directory in parents:
+            if unique_counts[directory] != totals.get(directory):
+                break
+            folder = directory
+
+        if folder is None:
+            entries[path] = {'path': path, 'is_folder': False, 'files': 1, 'size': size}
+        elif folder not in entries:
+            entries[folder] = {'path': folder, 'is_folder': True,
+                               'files': unique_counts[folder], 'size': unique_sizes[folder]}
+
+    return [entries[path] for path in sorted(entries)]
@@ -0,0 +1,122 @@
+import os
+
+def _identity(path):
+    """Return (st_dev, st_ino) of a path, following symlinks"""
+    stat = os.stat(path)
+    return stat.st_dev, stat.st_ino
+
+def _is_inside(path, directory):
+    """Check if path lies strictly inside directory"""
+    return path.startswith(directory.rstrip(os.sep) + os.sep)
+
+def build_scan_plan(group_paths):
+    """
+    Plan the walks for all groups so every physical subtree is walked once.
+
+    Roots are resolved (symlinks, '..', trailing separators) and roots that are
+    the same directory, by path or by (st_dev, st_ino), are merged. A root nested
+    inside another root is pruned from the outer walk and walked on its own; its
+    files belong to the groups of the nested root and of every enclosing root.
+
+    Args:
+        group_paths: List of path lists, one per group
+
+    Returns:
+        list: Segments as dicts of
+              path    - resolved directory (or archive) to walk
+              exclude - set of nested roots to prune from this walk
+              groups  - {group index: sort position} for the groups that own the files
+    """
+    # Resolve and merge duplicate roots, remembering each group's path order
+    roots = {}
+    identities = {}
+    for group, paths in enumerate(group_paths):
+        for position, path in enumerate(paths):
+            resolved = os.path.realpath(path)
+            identity = _identity(resolved)
+            resolved = identities.setdefault(identity, resolved)
+            owners = roots.setdefault(resolved, {})
+            owners[group] = min(owners.get(group, position), position)
+
+    # Only directories can contain other roots; archives and files stand alone
+    directories = [root for root in roots if os.path.isdir(root)]
+
+    segments = []
+    for root in roots:
+        if root not in directories:
+            # An archive inside a walked directory is not expanded by that walk
+            segments.append({'path': root, 'exclude': set(), 'groups': dict(roots[root])})
+            continue
+
+        enclosing = sorted((other for other in directories if _is_inside(root, other)), key=len)
+        nested = [other for other in directories if _is_inside(other, root)]
+
+        # Prune only the outermost nested roots; deeper ones are pruned by their parents
+        exclude = {other for other in nested
+                   if not any(_is_inside(other, middle) for middle in nested)}
+
+        # Inherit group ownership from enclosing roots; a group orders the segment
+        # by the earliest of its paths that covers it
+        groups = {}
+        for owner in enclosing + [root]:
+            for group, position in roots[owner].items():
+                groups[group] = min(groups.get(group, position), position)
+
+        segments.append({'path': root, 'exclude': exclude, 'groups': groups})
+
+    return segments
+
+def scan_groups(group_paths, get_files_dict):
+    """
+    Walk all groups following build_scan_plan() and attribute the results.
+
+    Args:
+        group_paths: List of path lists, one per group
+        get_files_dict: Mode function called as get_files_dict(path, exclude=...)
+
+    Returns:
+        tuple: (groups, counts) - one files dictionary per group, first occurrence
+               of a key wins, and one {directory: files listed} per group
+    """
+    segments = build_scan_plan(group_paths)
+    requested = sum(len(paths) for paths in group_paths)
+    print(f"Scan plan: {requested} path{'s' if requested > 1 else ''} -> "
+          f"{len(segments)} walk{'s' if len(segments) > 1 else ''}")
+
+    for segment in segments:
+        print(f"Scanning: {segment['path']}")
+        segment['counts'] = {}
+        segment['files'] = get_files_dict(segment['path'], exclude=segment['exclude'],
+                                          counts=segment['counts'])
+
+    # Segments are disjoint subtrees, so their directories never overlap
+    counts = []
+    for group in range(len(group_paths)):
+        group_counts = {}
+        for segment in segments:
+            if group in segment['groups']:
+                group_counts.update(segment['counts'])
+        counts.append(group_counts)
+
+    return merge_segments(segments, len(group_paths)), counts
+
+def merge_segments(segments, group_count):
+    """
+    Attribute walked segments (each holding its 'files') to their groups.
+
+    Returns:
+        list: One files dictionary per group, first occurrence of a key wins
+    """
+    groups = []
+    for group in range(group_count):
+        owned = [segment for segment in segments if group in segment['groups']]
+        owned.sort(key=lambda segment: segment['groups'][group])
+
+        group_files = {}
+        for segment in owned:
+            for key, value in segment['files'].items():
+                if key not in group_files:
+                    group_files[key] = value
+        groups.append(group_files)
+
+    return groups